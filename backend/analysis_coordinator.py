@@ -0,0 +1,186 @@
+import asyncio
+import time
+from typing import AsyncIterator, Callable, Dict, List, Optional, Set, Tuple
+
+from metrics import span
+from redis_cache_layer import MarketAnalysisCache, analysis_id
+
+Event = Tuple[str, Dict]
+TERMINAL_EVENTS = ('complete', 'error')
+
+class _Flight:
+    """One in-flight analysis: its task plus the section events produced so far."""
+    def __init__(self):
+        self.task: Optional[asyncio.Task] = None
+        self.events: List[Event] = []
+        self.listeners: Set[asyncio.Queue] = set()
+
+    def publish(self, event: Event):
+        self.events.append(event)
+        for queue in self.listeners:
+            queue.put_nowait(event)
+
+class AnalysisCoordinator:
+    """Single-flight analysis per genre, across tasks in this process and across workers.
+
+    Concurrent callers for the same normalized genre share one in-flight analysis;
+    a Redis lock makes other uvicorn workers wait for that result instead of scraping
+    themselves. With stale-while-revalidate on, an expired entry is served at once
+    while one background refresh runs.
+
+    `stream` is an async generator of (section, data) events ending with
+    ('complete', response). Stream subscribers receive each section as the shared
+    flight produces it; get/refresh callers just await the final response.
+
+    Non-default lang/country pairs are cached and coalesced separately; extra
+    `options` (e.g. a shared scraper) are passed through to `stream`.
+    """
+    def __init__(self, cache: MarketAnalysisCache, stream: Callable[..., AsyncIterator[Event]],
+                 lock_ttl: int = 180, poll_interval: float = 0.5, stale_while_revalidate: bool = True):
+        self.cache = cache
+        self.stream = stream
+        self.lock_ttl = lock_ttl
+        self.poll_interval = poll_interval
+        self.stale_while_revalidate = stale_while_revalidate
+        self._inflight: Dict[str, _Flight] = {}
+
+    def _present(self, entry: Dict) -> Dict:
+        # Same fields as the pre-rendered wire body, so every path returns one shape
+        return {**entry['data'], **self.cache.cache_fields(entry['cached_at'])}
+
+    async def _cached(self, genre: str, lang: str, country: str) -> Optional[Dict]:
+        """Fresh entry, or a stale one (starting a background refresh) when SWR is on."""
+        entry = await self.cache.get_entry(analysis_id(genre, lang, country))
+        if entry and not entry['is_stale']:
+            return self._present(entry)
+        if entry and self.stale_while_revalidate:
+            self._start(genre, lang=lang, country=country)
+            return self._present(entry)
+        return None
+
+    async def cached_version(self, genre: str, lang: str = 'en', country: str = 'us') -> Optional[Dict]:
+        """The cache check in get(), reading only the entry's ETag and age (never its payload)."""
+        meta = await self.cache.get_wire_meta(analysis_id(genre, lang, country))
+        if meta and meta['is_stale']:
+            if not self.stale_while_revalidate:
+                return None
+            self._start(genre, lang=lang, country=country)
+        return meta
+
+    async def get(self, genre: str, progress: Optional[Callable[[str], None]] = None,
+                  lang: str = 'en', country: str = 'us', **options) -> Dict:
+        """Serves from cache when possible, otherwise joins or starts the genre's analysis."""
+        cached = await self._cached(genre, lang, country)
+        if cached is not None:
+            return cached
+        return await self.refresh(genre, progress, lang=lang, country=country, **options)
+
+    async def refresh(self, genre: str, progress: Optional[Callable[[str], None]] = None,
+                      lang: str = 'en', country: str = 'us', **options) -> Dict:
+        """Recomputes the genre, joining an in-flight analysis rather than duplicating it.
+
+        `progress` only receives stage updates when this call starts the analysis.
+        """
+        # shield: one caller disconnecting must not cancel the work others are waiting on
+        return await asyncio.shield(self._start(genre, progress, lang, country, options).task)
+
+    async def subscribe(self, genre: str, refresh: bool = False,
+                        lang: str = 'en', country: str = 'us') -> AsyncIterator[Event]:
+        """Yields the genre's section events, replaying any the shared flight already produced."""
+        if not refresh:
+            cached = await self._cached(genre, lang, country)
+            if cached is not None:
+                yield 'complete', cached
+                return
+
+        flight = self._start(genre, lang=lang, country=country)
+        queue: asyncio.Queue = asyncio.Queue()
+        # Snapshot and register with no await in between so no event is missed or repeated
+        replay = list(flight.events)
+        flight.listeners.add(queue)
+        try:
+            for event in replay:
+                yield event
+                if event[0] in TERMINAL_EVENTS:
+                    return
+            while True:
+                event = await queue.get()
+                yield event
+                if event[0] in TERMINAL_EVENTS:
+                    return
+        finally:
+            flight.listeners.discard(queue)
+
+    def is_inflight(self, genre: str, lang: str = 'en', country: str = 'us') -> bool:
+        return analysis_id(genre, lang, country) in self._inflight
+
+    @property
+    def inflight_count(self) -> int:
+        return len(self._inflight)
+
+    def _start(self, genre: str, progress: Optional[Callable[[str], None]] = None,
+               lang: str = 'en', country: str = 'us', options: Optional[Dict] = None) -> _Flight:
+        key = analysis_id(genre, lang, country)
+        flight = self._inflight.get(key)
+        if flight is None:
+            flight = _Flight()
+            options = {**(options or {}), 'lang': lang, 'country': country}
+            flight.task = asyncio.ensure_future(self._run(genre, key, flight, progress, options))
+            self._inflight[key] = flight
+            flight.task.add_done_callback(lambda t: self._finish(key, t))
+        return flight
+
+    def _finish(self, key: str, task: asyncio.Task):
+        self._inflight.pop(key, None)
+        if not task.cancelled() and task.exception() is not None:
+            print(f"❌ Analysis failed for '{key}': {task.exception()}")
+
+    async def _run(self, genre: str, key: str, flight: _Flight,
+                   progress: Optional[Callable[[str], None]], options: Dict) -> Dict:
+        try:
+            response = await self._compute(genre, key, flight, progress, options)
+        except Exception as e:
+            flight.publish(('error', {'detail': str(e)}))
+            raise
+        flight.publish(('complete', response))
+        return response
+
+    async def _compute(self, genre: str, key: str, flight: _Flight,
+                       progress: Optional[Callable[[str], None]], options: Dict) -> Dict:
+        started = time.time()
+        token = await self.cache.acquire_lock(key, self.lock_ttl)
+        if token is None:
+            with span('peer_wait'):
+                peer_result = await self._wait_for_peer(key, started)
+            if peer_result is not None:
+                return peer_result
+            # The other worker died or gave up; its lock has lapsed, so take over
+            token = await self.cache.acquire_lock(key, self.lock_ttl)
+        try:
+            response = None
+            with span('analysis'):
+                async for section, data in self.stream(genre, progress=progress, **options):
+                    if section == 'complete':
+                        response = data
+                    else:
+                        flight.publish((section, data))
+            await self.cache.cache_analysis(key, response)
+            return response
+        finally:
+            if token:
+                await self.cache.release_lock(key, token)
+
+    async def _wait_for_peer(self, key: str, started: float) -> Optional[Dict]:
+        """Polls for the result another worker is computing under the lock."""
+        deadline = started + self.lock_ttl
+        while time.time() < deadline:
+            await asyncio.sleep(self.poll_interval)
+            # Check the lock before the entry: the peer writes, then releases
+            still_locked = await self.cache.is_locked(key)
+            # Skip L1: it may still hold this worker's copy from before the peer's refresh
+            entry = await self.cache.get_entry(key, bypass_l1=True)
+            if entry and entry['cached_at'] and entry['cached_at'] >= started:
+                return self._present(entry)
+            if not still_locked:
+                return None
+        return None
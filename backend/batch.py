@@ -0,0 +1,101 @@
+import asyncio
+import os
+import time
+import uuid
+from typing import Dict, List, Optional
+
+from analysis_coordinator import AnalysisCoordinator
+from jobs import JobStore
+from scraper import PlayStoreScraper, TokenBucket, get_shared_limiter
+
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "4"))        # Genres analyzed at once (clients may ask for fewer)
+BATCH_MAX_CONCURRENCY = int(os.getenv("BATCH_MAX_CONCURRENCY", "8"))  # Upstream calls in flight, whole batch
+BATCH_RATE_PER_SECOND = float(os.getenv("BATCH_RATE_PER_SECOND", "0"))  # 0 = share the live-traffic bucket
+BATCH_MAX_ITEMS = int(os.getenv("BATCH_MAX_ITEMS", "500"))
+
+class BatchAnalyzer:
+    """Runs many genre analyses through one shared scheduler.
+
+    Every genre in a batch uses one PlayStoreScraper, so the whole sweep has a single
+    concurrency cap and rate budget, and an app that several genres surface is fetched
+    once. Results go through the coordinator, so each is cached the moment it finishes
+    and live requests for the same genre join it rather than scraping again.
+    """
+    def __init__(self, coordinator: AnalysisCoordinator, store: JobStore, artifacts=None):
+        self.coordinator = coordinator
+        self.store = store
+        self.artifacts = artifacts
+        self._tasks: Dict[str, asyncio.Task] = {}
+
+    @staticmethod
+    def _key(batch_id: str) -> str:
+        return f"genregenius:batch:{batch_id}"
+
+    async def submit(self, items: List[Dict], refresh: bool = True, concurrency: int = BATCH_CONCURRENCY) -> Dict:
+        """Starts a batch in the background and returns its initial summary.
+
+        The rate budget is server-side only, and `concurrency` is capped at BATCH_CONCURRENCY.
+        Raises ValueError for more than BATCH_MAX_ITEMS items.
+        """
+        if len(items) > BATCH_MAX_ITEMS:
+            raise ValueError(f"A batch holds at most {BATCH_MAX_ITEMS} genres, got {len(items)}")
+        batch_id = uuid.uuid4().hex
+        seen = set()
+        unique = []
+        for item in items:
+            spec = {'genre': item['genre'], 'lang': item.get('lang', 'en'), 'country': item.get('country', 'us')}
+            ident = (spec['genre'].strip().lower(), spec['lang'], spec['country'])
+            if ident not in seen:
+                seen.add(ident)
+                unique.append(spec)
+
+        summary = {
+            'batch_id': batch_id, 'status': 'running', 'submitted_at': time.time(), 'finished_at': None,
+            'elapsed_seconds': None, 'total': len(unique), 'completed': 0, 'failed': 0,
+            'upstream_calls': {}, 'upstream_errors': {}, 'deduplicated_fetches': {},
+            'genres': [{**spec, 'status': 'queued', 'seconds': None} for spec in unique]
+        }
+        await self.store.set(self._key(batch_id), summary)
+        task = asyncio.ensure_future(self._run(summary, refresh, min(concurrency, BATCH_CONCURRENCY)))
+        self._tasks[batch_id] = task
+        task.add_done_callback(lambda _: self._tasks.pop(batch_id, None))
+        return summary
+
+    async def get(self, batch_id: str) -> Optional[Dict]:
+        return await self.store.get(self._key(batch_id))
+
+    async def _run(self, summary: Dict, refresh: bool, concurrency: int):
+        limiter = TokenBucket(rate=BATCH_RATE_PER_SECOND) if BATCH_RATE_PER_SECOND > 0 else get_shared_limiter()
+        scraper = PlayStoreScraper(max_concurrency=BATCH_MAX_CONCURRENCY, rate_limiter=limiter,
+                                   artifacts=self.artifacts)
+        slots = asyncio.Semaphore(max(1, concurrency))
+        started = time.perf_counter()
+
+        async def analyze(entry: Dict):
+            async with slots:
+                entry['status'] = 'running'
+                began = time.perf_counter()
+                try:
+                    run = self.coordinator.refresh if refresh else self.coordinator.get
+                    result = await run(entry['genre'], lang=entry['lang'], country=entry['country'], scraper=scraper)
+                    entry.update(status='done', opportunity_score=result['metrics']['opportunity_score'],
+                                 apps=result['metrics']['top_apps_count'], cached=bool(result.get('is_cached')))
+                    summary['completed'] += 1
+                except Exception as e:
+                    entry.update(status='failed', error=str(e))
+                    summary['failed'] += 1
+                entry['seconds'] = round(time.perf_counter() - began, 3)
+                self._update_counters(summary, scraper)
+                await self.store.set(self._key(summary['batch_id']), summary)
+
+        await asyncio.gather(*(analyze(entry) for entry in summary['genres']))
+        summary.update(status='done', finished_at=time.time(),
+                       elapsed_seconds=round(time.perf_counter() - started, 3))
+        self._update_counters(summary, scraper)
+        await self.store.set(self._key(summary['batch_id']), summary)
+
+    @staticmethod
+    def _update_counters(summary: Dict, scraper: PlayStoreScraper):
+        summary['upstream_calls'] = dict(scraper.upstream_calls)
+        summary['upstream_errors'] = dict(scraper.upstream_errors)
+        summary['deduplicated_fetches'] = dict(scraper.deduplicated)
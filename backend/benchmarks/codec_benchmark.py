@@ -0,0 +1,82 @@
+"""Compares cache payload codecs against the original json.dumps/json.loads path.
+
+Run from backend/: python benchmarks/codec_benchmark.py
+"""
+import json
+import os
+import random
+import string
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cache_codecs import PayloadCodec, SERIALIZERS
+
+WORDS = ["track", "plan", "smart", "daily", "sync", "offline", "goal", "habit", "premium", "coach",
+         "budget", "secure", "cloud", "reminder", "widget", "focus", "team", "export", "dark", "mode"]
+
+def _description(rng: random.Random, n_words: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(n_words)) + "."
+
+def make_payload(genre: str, n_apps: int = 10, seed: int = 7) -> dict:
+    """Builds a dashboard response shaped like the final event of stream_analysis."""
+    rng = random.Random(seed)
+    apps = [{
+        'app_id': f"com.{''.join(rng.choices(string.ascii_lowercase, k=8))}.app",
+        'title': f"{genre} App {i}",
+        'rating': round(rng.uniform(3.0, 4.9), 2),
+        'installs_numeric': rng.choice([10_000, 100_000, 1_000_000, 10_000_000]),
+        'description': _description(rng, rng.randint(300, 700)),
+        'icon': f"https://play-lh.googleusercontent.com/{''.join(rng.choices(string.ascii_letters, k=40))}"
+    } for i in range(n_apps)]
+    return {
+        'data': {
+            "genre": genre,
+            "metrics": {"opportunity_score": 62, "saturation_score": 41, "top_apps_count": n_apps, "search_volume": "3M/mo"},
+            "sentiment_chart_data": [{"complaint": c, "count": rng.randint(1, 30)} for c in
+                                     ["Too Many Ads", "Bugs/Crashes", "Expensive", "Poor UI", "Missing Features"]],
+            "opportunity_matrix": [{"feature": f"Feature {i}", "market": rng.randint(20, 85), "opportunity": rng.randint(30, 95)} for i in range(5)],
+            "growth_trend": [{"month": m, "downloads": rng.randint(1000, 90000), "revenue": rng.randint(50, 4500)} for m in ["Oct", "Nov", "Dec", "Jan"]],
+            "recommendations": [{"priority": "HIGH", "title": "Develop Feature 0", "reasoning": "Gap found.", "impact": "Market Acquisition"}],
+            "tech_stack": [{"category": "Backend", "recommended": "FastAPI", "reasoning": "Async scraping."}],
+            "aso_keywords": ["smart", "ai", genre],
+            "play_store_apps": apps,
+            "is_cached": False,
+            "last_updated": "2026-01-01 00:00:00"
+        },
+        'cached_at': 1767225600.0
+    }
+
+def _time(fn, arg, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn(arg)
+    return (time.perf_counter() - start) / repeat * 1e6
+
+def run(repeat: int = 500) -> list:
+    results = []
+    for n_apps in (3, 10, 50):
+        payload = make_payload("Fitness", n_apps)
+        baseline = json.dumps(payload)
+        variants = [("json (current)", lambda o: json.dumps(o), json.loads, baseline)]
+        for serializer in SERIALIZERS.values():
+            for threshold, label in ((None, "raw"), (1024, "zlib")):
+                codec = PayloadCodec(serializer.name, compress_threshold=threshold)
+                variants.append((f"{serializer.name}+{label}", codec.encode, codec.decode, codec.encode(payload)))
+        for name, encode, decode, encoded in variants:
+            results.append({
+                'apps': n_apps,
+                'codec': name,
+                'encode_us': round(_time(encode, payload, repeat), 1),
+                'decode_us': round(_time(decode, encoded, repeat), 1),
+                'stored_bytes': len(encoded),
+                'size_vs_json': round(len(encoded) / len(baseline), 3)
+            })
+    return results
+
+if __name__ == "__main__":
+    rows = run()
+    print(f"{'apps':>4}  {'codec':<16}{'encode µs':>11}{'decode µs':>11}{'bytes':>9}{'vs json':>9}")
+    for r in rows:
+        print(f"{r['apps']:>4}  {r['codec']:<16}{r['encode_us']:>11}{r['decode_us']:>11}{r['stored_bytes']:>9}{r['size_vs_json']:>9}")
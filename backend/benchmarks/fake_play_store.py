@@ -0,0 +1,162 @@
+"""Offline stand-in for the google_play_scraper functions PlayStoreScraper calls.
+
+Serves synthetic apps and reviews, or fixtures recorded from the live store, with
+configurable latency and error injection so scraper benchmarks are reproducible.
+
+Record fixtures once (needs network), from backend/:
+    python benchmarks/fake_play_store.py Fitness Finance -o benchmarks/fixtures.json
+"""
+import argparse
+import json
+import random
+import string
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+PHRASES = [
+    "Way too many ads, every screen shows one", "App keeps crashing after the update",
+    "Too expensive for what it does, the subscription is a rip off", "The UI is confusing and slow",
+    "Missing features I need, please add export", "Love it, works great", "Syncing is broken again",
+    "Freezes on startup", "Pay to unlock everything", "Battery drain is terrible", "Solid app overall"
+]
+BASE_TIME = datetime(2026, 1, 1)
+
+class FakePlayStoreError(Exception):
+    """Injected upstream failure."""
+
+class ContinuationToken:
+    """Mirrors google_play_scraper's token: `.token` is None once the last page was served."""
+    def __init__(self, token: Optional[int]):
+        self.token = token
+
+class FakePlayStore:
+    """Drop-in `client` for PlayStoreScraper (search, app, reviews, reviews_all).
+
+    Each call sleeps `latency` plus up to `jitter` seconds, like a network round trip in
+    the scraper's worker threads, then fails with probability `error_rate`. Unknown apps
+    and queries get deterministic synthetic data derived from `seed`.
+    """
+    def __init__(self, latency: float = 0.05, jitter: float = 0.0, error_rate: float = 0.0, seed: int = 7,
+                 fixtures: Optional[Dict] = None, reviews_per_app: int = 500):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.seed = seed
+        self.reviews_per_app = reviews_per_app
+        self.fixtures = fixtures or {'search': {}, 'apps': {}, 'reviews': {}}
+        self.calls = Counter()
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()  # Calls arrive from the scraper's thread pool
+
+    @classmethod
+    def from_fixtures(cls, path: str, **options) -> 'FakePlayStore':
+        with open(path) as f:
+            fixtures = json.load(f)
+        for batch in fixtures.get('reviews', {}).values():
+            for r in batch:
+                r['at'] = datetime.fromisoformat(r['at'])
+        return cls(fixtures=fixtures, **options)
+
+    def _simulate(self, name: str):
+        with self._lock:
+            self.calls[name] += 1
+            delay = self.latency + self._rng.uniform(0, self.jitter)
+            fail = self._rng.random() < self.error_rate
+        time.sleep(delay)
+        if fail:
+            raise FakePlayStoreError(f"injected {name} failure")
+
+    def _app_ids(self, query: str, n_hits: int) -> List[str]:
+        recorded = self.fixtures['search'].get(query.strip().lower())
+        if recorded is not None:
+            return recorded[:n_hits]
+        rng = random.Random(f"{self.seed}:search:{query.lower()}")
+        # Overlapping id space so related genres share some apps, as on the real store
+        return [f"com.fake.app{rng.randint(0, 400)}" for _ in range(n_hits)]
+
+    def _details(self, app_id: str) -> Dict:
+        if app_id in self.fixtures['apps']:
+            return self.fixtures['apps'][app_id]
+        rng = random.Random(f"{self.seed}:app:{app_id}")
+        return {
+            'appId': app_id,
+            'title': f"{app_id.rsplit('.', 1)[-1].title()} {''.join(rng.choices(string.ascii_uppercase, k=3))}",
+            'score': round(rng.uniform(3.0, 4.9), 2),
+            'installs': f"{rng.choice([10_000, 100_000, 1_000_000, 10_000_000]):,}+",
+            'description': " ".join(rng.choice(PHRASES) for _ in range(rng.randint(20, 60))),
+            'icon': f"https://example.invalid/{app_id}.png"
+        }
+
+    def _reviews(self, app_id: str) -> List[Dict]:
+        if app_id in self.fixtures['reviews']:
+            return self.fixtures['reviews'][app_id]
+        rng = random.Random(f"{self.seed}:reviews:{app_id}")
+        return [{
+            'reviewId': f"{app_id}:{i}",
+            'content': rng.choice(PHRASES),
+            'score': rng.choice([1, 1, 2, 2, 3, 4, 5, 5]),
+            'at': BASE_TIME - timedelta(hours=i)  # Newest first
+        } for i in range(self.reviews_per_app)]
+
+    # --- google_play_scraper surface ---
+    def search(self, query: str, lang: str = 'en', country: str = 'us', n_hits: int = 30) -> List[Dict]:
+        self._simulate('search')
+        return [{k: v for k, v in self._details(app_id).items() if k != 'description'}
+                for app_id in self._app_ids(query, n_hits)]
+
+    def app(self, app_id: str, lang: str = 'en', country: str = 'us') -> Dict:
+        self._simulate('app')
+        return dict(self._details(app_id))
+
+    def reviews(self, app_id: str, lang: str = 'en', country: str = 'us', sort=None, count: int = 100,
+                filter_score_with: Optional[int] = None, continuation_token: Optional[ContinuationToken] = None):
+        self._simulate('reviews')
+        batch = self._reviews(app_id)
+        if filter_score_with is not None:
+            batch = [r for r in batch if r['score'] == filter_score_with]
+        offset = continuation_token.token if continuation_token is not None and continuation_token.token else 0
+        page = batch[offset:offset + count]
+        next_offset = offset + count if offset + count < len(batch) else None
+        return [dict(r) for r in page], ContinuationToken(next_offset)
+
+    def reviews_all(self, app_id: str, **kwargs) -> List[Dict]:
+        result, token = self.reviews(app_id, **kwargs)
+        while token.token is not None:
+            page, token = self.reviews(app_id, continuation_token=token, **kwargs)
+            result.extend(page)
+        return result
+
+def record_fixtures(genres: List[str], n_hits: int = 10, reviews_per_app: int = 200,
+                    lang: str = 'en', country: str = 'us') -> Dict:
+    """Captures live search hits, app details and newest reviews for `genres`."""
+    from google_play_scraper import Sort, app, reviews, search
+
+    fixtures = {'search': {}, 'apps': {}, 'reviews': {}}
+    for genre in genres:
+        app_ids = [hit['appId'] for hit in search(genre, lang=lang, country=country, n_hits=n_hits)]
+        fixtures['search'][genre.strip().lower()] = app_ids
+        for app_id in app_ids:
+            if app_id in fixtures['apps']:
+                continue
+            details = app(app_id, lang=lang, country=country)
+            fixtures['apps'][app_id] = {k: details.get(k) for k in
+                                        ('appId', 'title', 'score', 'installs', 'description', 'icon')}
+            batch, _ = reviews(app_id, lang=lang, country=country, sort=Sort.NEWEST, count=reviews_per_app)
+            fixtures['reviews'][app_id] = [{'reviewId': r['reviewId'], 'content': r['content'], 'score': r['score'],
+                                            'at': r['at'].isoformat()} for r in batch]
+    return fixtures
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Record Play Store fixtures for FakePlayStore.")
+    parser.add_argument("genres", nargs="+")
+    parser.add_argument("-o", "--output", default="benchmarks/fixtures.json")
+    parser.add_argument("--hits", type=int, default=10)
+    parser.add_argument("--reviews", type=int, default=200)
+    args = parser.parse_args()
+    recorded = record_fixtures(args.genres, n_hits=args.hits, reviews_per_app=args.reviews)
+    with open(args.output, "w") as f:
+        json.dump(recorded, f)
+    print(f"✅ Recorded {len(recorded['apps'])} apps for {len(args.genres)} genres to {args.output}")
@@ -0,0 +1,328 @@
+"""End-to-end performance suite against the offline Play Store stand-in and fakeredis.
+
+Suites: scrape throughput, sentiment on 1k/100k/1M reviews, analysis cache latency,
+PDF render time, /api/analyze under concurrent load and API process startup. Results are written as JSON;
+pass an earlier file to --compare to flag regressions.
+Needs fakeredis and httpx on top of requirements.txt (pip install fakeredis httpx).
+
+Run from backend/:
+    python benchmarks/pipeline_benchmark.py                  # full run
+    python benchmarks/pipeline_benchmark.py --quick          # smaller sizes, seconds not minutes
+    python benchmarks/pipeline_benchmark.py --compare benchmarks/results/<earlier>.json
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+from typing import Callable, Dict, List
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+# Measure the pipeline, not the politeness budget towards the real store
+os.environ.setdefault("SCRAPER_RATE_PER_SECOND", "0")
+os.environ.setdefault("WARM_ENABLED", "0")
+# Synthetic genres and apps must never land in the real history database
+os.environ["HISTORY_ENABLED"] = "0"
+
+from benchmarks.codec_benchmark import make_payload
+from benchmarks.fake_play_store import PHRASES, FakePlayStore
+
+RESULTS_DIR = os.path.join(BACKEND_DIR, "benchmarks", "results")
+LOWER_IS_BETTER = ("_ms", "_us", "_seconds")
+HIGHER_IS_BETTER = ("_per_s",)
+
+def _percentiles(samples: List[float]) -> Dict[str, float]:
+    ordered = sorted(samples)
+    return {
+        'p50': ordered[len(ordered) // 2],
+        'p95': ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+        'mean': statistics.fmean(ordered)
+    }
+
+@contextlib.contextmanager
+def _quiet():
+    # The pipeline narrates every analysis with print(); keep the report readable
+    with contextlib.redirect_stdout(io.StringIO()):
+        yield
+
+def _fake_redis():
+    import fakeredis
+    return fakeredis.FakeAsyncRedis()
+
+# --- SUITES ---
+async def bench_scrape(quick: bool) -> List[Dict]:
+    from scraper import PlayStoreScraper, ReviewHistory, iter_analysis
+
+    genres = [f"Genre {i}" for i in range(4 if quick else 12)]
+    rows = []
+    for latency, error_rate in ((0.05, 0.0), (0.05, 0.1)):
+        client = FakePlayStore(latency=latency, jitter=latency / 2, error_rate=error_rate)
+        play = PlayStoreScraper(client=client)
+        play.review_history = ReviewHistory()  # Cold: no reviews swept by an earlier run
+        started = time.perf_counter()
+        with _quiet():
+            async def one(genre):
+                async for _ in iter_analysis(genre, scraper=play):
+                    pass
+            await asyncio.gather(*(one(g) for g in genres))
+        elapsed = time.perf_counter() - started
+        rows.append({
+            'name': f"latency={latency}s errors={error_rate:.0%}",
+            'analyses': len(genres),
+            'total_seconds': round(elapsed, 3),
+            'analyses_per_s': round(len(genres) / elapsed, 2),
+            'upstream_calls': sum(play.upstream_calls.values()),
+            'upstream_errors': sum(play.upstream_errors.values()),
+            'deduplicated': sum(play.deduplicated.values())
+        })
+    return rows
+
+def _synthetic_reviews(n: int, seed: int = 11):
+    rng = random.Random(seed)
+    for i in range(n):
+        yield {'review_id': str(i), 'content': f"{rng.choice(PHRASES)}. {rng.choice(PHRASES)}", 'score': rng.randint(1, 3)}
+
+async def bench_sentiment(quick: bool) -> List[Dict]:
+    from sentiment import SentimentAnalyzer
+
+    analyzer = SentimentAnalyzer("Fitness")
+    rows = []
+    for n in ((1_000, 100_000) if quick else (1_000, 100_000, 1_000_000)):
+        if n <= 100_000:
+            reviews = list(_synthetic_reviews(n))
+            started = time.perf_counter()
+            analyzer.analyze_reviews(reviews)
+            mode = "analyze_reviews"
+        else:
+            # A million review dicts do not fit comfortably in memory; stream them
+            started = time.perf_counter()
+            analyzer.analyze_stream(_synthetic_reviews(n))
+            mode = "analyze_stream"
+        elapsed = time.perf_counter() - started
+        rows.append({'name': f"{n} reviews", 'mode': mode, 'total_seconds': round(elapsed, 3),
+                     'reviews_per_s': round(n / elapsed)})
+    return rows
+
+async def bench_cache(quick: bool) -> List[Dict]:
+    from redis_cache_layer import MarketAnalysisCache
+
+    cache = MarketAnalysisCache()
+    cache.redis_client = _fake_redis()
+    repeat = 200 if quick else 2000
+    rows = []
+    for n_apps in (10, 50):
+        payload = make_payload("Fitness", n_apps)['data']
+        genre = f"bench-{n_apps}"
+        cases = [
+            ('write', lambda: cache.cache_analysis(genre, payload)),
+            ('l1_hit', lambda: cache.get_entry(genre)),
+            ('redis_hit', lambda: cache.get_entry(genre, bypass_l1=True)),
+            ('miss', lambda: cache.get_entry(f"missing-{n_apps}")),
+        ]
+        for case, call in cases:
+            samples = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                await call()
+                samples.append((time.perf_counter() - started) * 1e6)
+            stats = _percentiles(samples)
+            rows.append({'name': f"{case} apps={n_apps}", 'p50_us': round(stats['p50'], 1),
+                         'p95_us': round(stats['p95'], 1), 'mean_us': round(stats['mean'], 1)})
+    await cache.redis_client.aclose()
+    return rows
+
+async def bench_pdf(quick: bool) -> List[Dict]:
+    from pdf_generator import MVPBlueprintGenerator
+
+    generator = MVPBlueprintGenerator()
+    data = make_payload("Fitness", 10)['data']
+    repeat = 2 if quick else 5
+    rows = []
+    charts = {}
+    for case in ('cold', 'charts_cached'):
+        samples, timings = [], {}
+        for _ in range(repeat):
+            started = time.perf_counter()
+            pdf_bytes, rendered = generator.render_bytes(data, charts if case == 'charts_cached' else None, timings)
+            samples.append((time.perf_counter() - started) * 1000)
+            charts = rendered
+        stats = _percentiles(samples)
+        rows.append({'name': case, 'p50_ms': round(stats['p50'], 1), 'mean_ms': round(stats['mean'], 1),
+                     'pdf_bytes': len(pdf_bytes),
+                     **{f"{part}_ms": round(seconds * 1000, 1) for part, seconds in timings.items()}})
+    return rows
+
+def _load_api():
+    import importlib.util
+    spec = importlib.util.spec_from_file_location("fastapi_backend", os.path.join(BACKEND_DIR, "fastapi-backend.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+async def bench_api(quick: bool) -> List[Dict]:
+    import httpx
+    import scraper
+
+    scraper.set_default_client(FakePlayStore(latency=0.05, jitter=0.025))
+    api = _load_api()
+    api.cache.redis_client = _fake_redis()
+    genres = [f"Load {i}" for i in range(5 if quick else 20)]
+    concurrency = 10 if quick else 50
+    requests_per_phase = 50 if quick else 500
+
+    rows = []
+    transport = httpx.ASGITransport(app=api.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for phase in ('cold', 'warm'):
+            slots = asyncio.Semaphore(concurrency)
+            samples, errors = [], 0
+
+            async def one(i):
+                nonlocal errors
+                async with slots:
+                    started = time.perf_counter()
+                    response = await client.get("/api/analyze", params={"genre": genres[i % len(genres)]})
+                    samples.append((time.perf_counter() - started) * 1000)
+                    errors += response.status_code != 200
+
+            started = time.perf_counter()
+            with _quiet():
+                await asyncio.gather(*(one(i) for i in range(requests_per_phase)))
+            elapsed = time.perf_counter() - started
+            stats = _percentiles(samples)
+            rows.append({'name': f"{phase} concurrency={concurrency}", 'requests': requests_per_phase,
+                         'errors': errors, 'requests_per_s': round(requests_per_phase / elapsed, 1),
+                         'p50_ms': round(stats['p50'], 2), 'p95_ms': round(stats['p95'], 2)})
+    await api.cache.redis_client.aclose()
+    scraper.set_default_client(None)
+    return rows
+
+# Runs in a fresh interpreter so nothing is already imported; prints one JSON line
+_STARTUP_PROBE = """
+import asyncio, importlib.util, json, sys, time
+started = time.perf_counter()
+spec = importlib.util.spec_from_file_location("fastapi_backend", "fastapi-backend.py")
+api = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(api)
+imported = time.perf_counter()
+numpy_at_import = "numpy" in sys.modules
+
+async def boot():
+    await api.boot.start()
+    while api.boot.readiness()["status"] != "ready":
+        await asyncio.sleep(0.01)
+    ready = time.perf_counter()
+    await api.boot.stop()
+    api.pdf_renderer.shutdown()
+    return ready
+
+ready = asyncio.run(boot())
+print(json.dumps({"import_ms": (imported - started) * 1000, "ready_ms": (ready - started) * 1000,
+                  "numpy_at_import": numpy_at_import}))
+"""
+
+async def bench_startup(quick: bool) -> List[Dict]:
+    rows = []
+    for mode in ('lazy', 'background', 'eager'):
+        # Redis is not waited on in any mode; keep its retries out of the way
+        env = {**os.environ, 'STARTUP_WARM_MODE': mode, 'REDIS_CONNECT_ATTEMPTS': '1'}
+        samples = []
+        for _ in range(3 if quick else 10):
+            started = time.perf_counter()
+            out = subprocess.run([sys.executable, "-c", _STARTUP_PROBE], cwd=BACKEND_DIR, env=env,
+                                 capture_output=True, text=True, check=True).stdout
+            wall = (time.perf_counter() - started) * 1000
+            samples.append({**json.loads(out.strip().splitlines()[-1]), 'wall_ms': wall})
+        rows.append({
+            'name': f"mode={mode}",
+            'import_ms': round(_percentiles([s['import_ms'] for s in samples])['p50'], 1),
+            'ready_ms': round(_percentiles([s['ready_ms'] for s in samples])['p50'], 1),
+            'process_wall_ms': round(_percentiles([s['wall_ms'] for s in samples])['p50'], 1),
+            'numpy_at_import': samples[0]['numpy_at_import']
+        })
+    return rows
+
+SUITES: Dict[str, Callable] = {
+    'scrape': bench_scrape,
+    'sentiment': bench_sentiment,
+    'cache': bench_cache,
+    'pdf': bench_pdf,
+    'api': bench_api,
+    'startup': bench_startup,
+}
+
+# --- REPORTING ---
+def compare(current: Dict, baseline: Dict, threshold: float) -> List[str]:
+    """Lists metrics that moved the wrong way by more than `threshold` (a fraction)."""
+    regressions = []
+    for suite, rows in current['results'].items():
+        before = {row['name']: row for row in baseline.get('results', {}).get(suite, [])}
+        for row in rows:
+            old = before.get(row['name'])
+            if not old:
+                continue
+            for metric, value in row.items():
+                if not isinstance(value, (int, float)) or not old.get(metric):
+                    continue
+                change = (value - old[metric]) / old[metric]
+                if metric.endswith(LOWER_IS_BETTER) and change > threshold or \
+                        metric.endswith(HIGHER_IS_BETTER) and change < -threshold:
+                    regressions.append(f"{suite}/{row['name']}/{metric}: {old[metric]} -> {value} ({change:+.0%})")
+    return regressions
+
+def _print_rows(suite: str, rows: List[Dict]):
+    print(f"\n== {suite} ==")
+    for row in rows:
+        metrics = "  ".join(f"{k}={v}" for k, v in row.items() if k != 'name')
+        print(f"  {row['name']:<28}{metrics}")
+
+async def run(suites: List[str], quick: bool) -> Dict:
+    report = {
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'quick': quick,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'results': {}
+    }
+    for suite in suites:
+        try:
+            report['results'][suite] = await SUITES[suite](quick)
+        except ImportError as e:
+            print(f"⚠️ Skipping {suite}: {e}")
+            continue
+        _print_rows(suite, report['results'][suite])
+    return report
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--suites", default=",".join(SUITES), help="comma-separated subset of: " + ", ".join(SUITES))
+    parser.add_argument("--quick", action="store_true", help="smaller inputs for a fast smoke run")
+    parser.add_argument("--output", help="result file (default: benchmarks/results/<timestamp>.json)")
+    parser.add_argument("--compare", help="earlier result file to check for regressions")
+    parser.add_argument("--threshold", type=float, default=0.15, help="allowed slowdown before flagging (fraction)")
+    args = parser.parse_args()
+
+    result = asyncio.run(run([s for s in args.suites.split(",") if s], args.quick))
+    output = args.output or os.path.join(RESULTS_DIR, f"{datetime.now():%Y%m%d-%H%M%S}.json")
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(result, f, indent=2)
+    print(f"\n💾 Results saved to {output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(result, json.load(f), args.threshold)
+        for line in regressions:
+            print(f"❌ {line}")
+        print("✅ No regressions" if not regressions else f"{len(regressions)} regression(s)")
+        sys.exit(1 if regressions else 0)
@@ -0,0 +1,86 @@
+import hashlib
+import json
+import struct
+import zlib
+from typing import Any, Dict
+
+try:
+    import msgpack
+except ImportError:  # Optional: compact JSON is used when msgpack is not installed
+    msgpack = None
+
+# Header: b"GG" magic, format version, serializer id, flags
+MAGIC = b"GG"
+FORMAT_VERSION = 1
+_HEADER = struct.Struct(">2sBBB")
+FLAG_ZLIB = 0x01
+
+COMPRESS_THRESHOLD = 1024  # Bytes; smaller payloads are not worth the zlib round trip
+# Level 1 keeps about 75% of the size win at a fraction of level 6 encode time (see benchmarks/)
+
+class JSONSerializer:
+    id = 0
+    name = "json"
+
+    def dumps(self, obj: Any) -> bytes:
+        return json.dumps(obj, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+    def loads(self, data: bytes) -> Any:
+        return json.loads(data)
+
+class MsgpackSerializer:
+    id = 1
+    name = "msgpack"
+
+    def dumps(self, obj: Any) -> bytes:
+        return msgpack.packb(obj, use_bin_type=True)
+
+    def loads(self, data: bytes) -> Any:
+        return msgpack.unpackb(data, raw=False)
+
+SERIALIZERS: Dict[int, Any] = {JSONSerializer.id: JSONSerializer()}
+if msgpack is not None:
+    SERIALIZERS[MsgpackSerializer.id] = MsgpackSerializer()
+
+class PayloadCodec:
+    """Encodes cache payloads as a versioned header plus an optionally zlib-compressed body.
+
+    Any serializer registered in SERIALIZERS can be decoded regardless of which one this
+    instance writes with, and headerless values are read as the plain JSON text older
+    releases stored.
+    """
+    def __init__(self, serializer: str = "msgpack", compress_threshold: int = COMPRESS_THRESHOLD,
+                 compress_level: int = 1):
+        by_name = {s.name: s for s in SERIALIZERS.values()}
+        self.serializer = by_name.get(serializer, SERIALIZERS[JSONSerializer.id])
+        self.compress_threshold = compress_threshold
+        self.compress_level = compress_level
+
+    def encode(self, obj: Any) -> bytes:
+        body = self.serializer.dumps(obj)
+        flags = 0
+        if self.compress_threshold is not None and len(body) >= self.compress_threshold:
+            body = zlib.compress(body, self.compress_level)
+            flags |= FLAG_ZLIB
+        return _HEADER.pack(MAGIC, FORMAT_VERSION, self.serializer.id, flags) + body
+
+    def decode(self, data) -> Any:
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        if not data.startswith(MAGIC):
+            return json.loads(data)
+        _, version, serializer_id, flags = _HEADER.unpack_from(data)
+        if version > FORMAT_VERSION:
+            raise ValueError(f"Unsupported cache format version {version}")
+        serializer = SERIALIZERS.get(serializer_id)
+        if serializer is None:
+            raise ValueError(f"Cache entry uses unavailable serializer id {serializer_id}")
+        body = data[_HEADER.size:]
+        if flags & FLAG_ZLIB:
+            body = zlib.decompress(body)
+        return serializer.loads(body)
+
+def content_hash(obj: Any) -> str:
+    """Stable hash of a JSON-compatible value: key order and whitespace do not matter."""
+    canonical = json.dumps(obj, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
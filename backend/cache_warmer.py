@@ -0,0 +1,159 @@
+import asyncio
+import os
+import time
+from collections import Counter
+from typing import Dict, List, Optional
+
+from analysis_coordinator import AnalysisCoordinator
+from redis_cache_layer import POPULARITY_MAX_GENRES, MarketAnalysisCache, normalize_genre
+
+WARM_ENABLED = os.getenv("WARM_ENABLED", "1") == "1"
+WARM_TOP_N = int(os.getenv("WARM_TOP_N", "10"))
+WARM_DEFAULT_GENRES = [g for g in os.getenv("WARM_DEFAULT_GENRES", "Productivity,Fitness,Finance").split(",") if g]
+WARM_INTERVAL = int(os.getenv("WARM_INTERVAL", "60"))              # Seconds between scheduler ticks
+WARM_REFRESH_AHEAD = int(os.getenv("WARM_REFRESH_AHEAD", "3600"))  # Refresh once less fresh TTL than this remains
+WARM_MAX_PER_TICK = int(os.getenv("WARM_MAX_PER_TICK", "2"))       # Refresh budget per tick
+WARM_MAX_LIVE_INFLIGHT = int(os.getenv("WARM_MAX_LIVE_INFLIGHT", "2"))  # Skip a tick while this many analyses run
+
+class CacheWarmer:
+    """Keeps the most requested genres cached before users ask for them.
+
+    Request counts are gathered in process and flushed to a Redis ranking each tick.
+    Each tick, popular genres that are missing or within WARM_REFRESH_AHEAD of expiry
+    are refreshed, most popular and closest to expiry first. The refresh budget per
+    tick and the live-traffic check keep warming from competing with users. Only
+    one worker runs a given tick.
+    """
+    def __init__(self, cache: MarketAnalysisCache, coordinator: AnalysisCoordinator,
+                 top_n: int = WARM_TOP_N, interval: int = WARM_INTERVAL,
+                 refresh_ahead: int = WARM_REFRESH_AHEAD, max_per_tick: int = WARM_MAX_PER_TICK,
+                 max_live_inflight: int = WARM_MAX_LIVE_INFLIGHT, default_genres: List[str] = WARM_DEFAULT_GENRES):
+        self.cache = cache
+        self.coordinator = coordinator
+        self.top_n = top_n
+        self.interval = interval
+        self.refresh_ahead = refresh_ahead
+        self.max_per_tick = max_per_tick
+        self.max_live_inflight = max_live_inflight
+        self.default_genres = default_genres
+        self._pending = Counter()      # Requests not yet flushed to Redis
+        self._local_counts = Counter()  # Fallback ranking while Redis is down
+        self._names: Dict[str, str] = {}
+        self._task: Optional[asyncio.Task] = None
+        self.last_plan: List[Dict] = []
+        self.last_run: Optional[float] = None
+        self.refreshed = Counter()
+
+    def record_request(self, genre: str):
+        """Counts one request for `genre`; no I/O on the request path."""
+        key = normalize_genre(genre)
+        self._names.setdefault(key, genre.strip())
+        self._pending[self._names[key]] += 1
+        self._local_counts[key] += 1
+        # Clients choose the genre strings, so the counters are pruned rather than left to grow
+        if len(self._local_counts) > 2 * POPULARITY_MAX_GENRES or len(self._pending) > 2 * POPULARITY_MAX_GENRES:
+            self._prune()
+
+    def _prune(self):
+        """Keeps the POPULARITY_MAX_GENRES most requested genres in each counter."""
+        self._pending = Counter(dict(self._pending.most_common(POPULARITY_MAX_GENRES)))
+        self._local_counts = Counter(dict(self._local_counts.most_common(POPULARITY_MAX_GENRES)))
+        keep = set(self._local_counts) | {normalize_genre(name) for name in self._pending}
+        self._names = {key: name for key, name in self._names.items() if key in keep}
+
+    async def _flush(self):
+        self._prune()
+        if self._pending:
+            pending, self._pending = self._pending, Counter()
+            if not await self.cache.add_popularity(pending):
+                self._pending.update(pending)
+
+    async def top_genres(self) -> List[Dict]:
+        ranked = await self.cache.top_popularity(self.top_n)
+        if ranked is None:
+            ranked = [(self._names[key], count) for key, count in self._local_counts.most_common(self.top_n)]
+        genres = [{'genre': genre, 'popularity': count} for genre, count in ranked]
+        # Defaults fill the list so a fresh deploy still has something to warm
+        known = {normalize_genre(g['genre']) for g in genres}
+        for genre in self.default_genres:
+            if len(genres) >= self.top_n:
+                break
+            if normalize_genre(genre) not in known:
+                genres.append({'genre': genre, 'popularity': 0})
+        return genres
+
+    async def plan(self) -> List[Dict]:
+        """Warmed genres with remaining fresh TTL and next refresh time, in refresh priority order."""
+        now = time.time()
+        plan = []
+        for item in await self.top_genres():
+            entry = await self.cache.get_entry(item['genre'])
+            if entry is None or entry['cached_at'] is None:
+                remaining, next_refresh = None, now
+            else:
+                remaining = max(0, self.cache.ttl - entry['age'])
+                next_refresh = entry['cached_at'] + self.cache.ttl - self.refresh_ahead
+            # Popular genres first; among similar popularity, the one closer to expiry
+            urgency = self.refresh_ahead / max(remaining if remaining is not None else 0, 60)
+            plan.append({**item, 'remaining_ttl': None if remaining is None else int(remaining),
+                         'next_refresh_at': next_refresh, 'due': next_refresh <= now,
+                         'priority': round((item['popularity'] + 1) * urgency, 3)})
+        plan.sort(key=lambda p: p['priority'], reverse=True)
+        return plan
+
+    async def tick(self, budget: Optional[int] = None) -> List[str]:
+        """Runs one scheduling pass; returns the genres refreshed."""
+        budget = self.max_per_tick if budget is None else budget
+        await self._flush()
+        self.last_plan = await self.plan()
+        self.last_run = time.time()
+        if self.coordinator.inflight_count >= self.max_live_inflight:
+            return []
+        # One worker per tick: the lock expires with the tick, no release needed
+        if await self.cache.acquire_lock("warmer:tick", max(1, self.interval - 1)) is None:
+            return []
+
+        refreshed = []
+        for item in self.last_plan:
+            if len(refreshed) >= budget:
+                break
+            if not item['due'] or self.coordinator.is_inflight(item['genre']):
+                continue
+            try:
+                await self.coordinator.refresh(item['genre'])
+                refreshed.append(item['genre'])
+                self.refreshed[item['genre']] += 1
+            except Exception as e:
+                print(f"⚠️ Warming '{item['genre']}' failed: {e}")
+            # Refresh one at a time and re-check live load between them
+            if self.coordinator.inflight_count >= self.max_live_inflight:
+                break
+        return refreshed
+
+    async def _loop(self):
+        budget = self.top_n  # Startup: warm the whole top N, still one genre at a time
+        while True:
+            try:
+                await self.tick(budget)
+                budget = self.max_per_tick
+            except Exception as e:
+                print(f"⚠️ Cache warmer tick failed: {e}")
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        """Starts warming in the background; the first tick doubles as the startup warm-up."""
+        if self._task is None:
+            self._task = asyncio.ensure_future(self._loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def status(self) -> Dict:
+        return {
+            'enabled': self._task is not None, 'interval': self.interval, 'top_n': self.top_n,
+            'refresh_ahead': self.refresh_ahead, 'max_per_tick': self.max_per_tick,
+            'last_run': self.last_run, 'refreshed': dict(self.refreshed), 'genres': self.last_plan
+        }
@@ -1,14 +1,29 @@
-from fastapi import FastAPI, HTTPException
+from startup import READY_REQUIRES_REDIS, StartupManager, add_health_endpoints  # First: starts the boot clock
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
-import tempfile  
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from pydantic import BaseModel, Field
+from typing import List, Optional
 import random
 import os
+import json
+import re
+import time
+from urllib.parse import quote
 from datetime import datetime
 import uvicorn
 
-from scraper import run_full_analysis
-from redis_cache_layer import MarketAnalysisCache, add_cache_endpoints
+from scraper import NEGATIVE_SCORES, iter_analysis
+from redis_cache_layer import BlobCache, MarketAnalysisCache, ScrapeArtifactCache, add_cache_endpoints
+from analysis_coordinator import AnalysisCoordinator
+from cache_warmer import WARM_ENABLED, CacheWarmer
+from metrics import add_metrics_endpoint
+from http_caching import SelectiveGZipMiddleware, cached_analysis_response, freshness_headers
+from history_store import HISTORY_ENABLED, TREND_BUCKETS, HistoryStore
+from jobs import JobManager, JobQueueFull, JobStore
+from pdf_service import PDFRenderService, RenderQueueFull
+from sentiment import GENRE_KEYWORDS, SentimentAnalyzer
+from batch import BATCH_CONCURRENCY, BATCH_MAX_ITEMS, BatchAnalyzer
 
 origins = [
     "http://localhost:5173",            # Local React
@@ -18,102 +33,349 @@ origins = [
 
 app = FastAPI(title="GenreGenius AI - Standardized Engine")
 cache = MarketAnalysisCache()
-add_cache_endpoints(app, cache)
+artifacts = ScrapeArtifactCache(cache)
+blobs = BlobCache(cache)
+add_cache_endpoints(app, cache, artifacts, blobs)
+add_metrics_endpoint(app)  # GET /metrics (Prometheus) and a Server-Timing header on every response
+pdf_renderer = PDFRenderService(blobs=blobs)
+# On-disk app snapshots and reviews: trend queries and offline rescoring
+history = HistoryStore() if HISTORY_ENABLED else None
 
-app.add_middleware(CORSMiddleware, allow_origins=origins, allow_methods=["*"], allow_headers=["*"])
+def warm_analysis_engine():
+    """Imports NumPy and the scoring engine and compiles every genre's keyword matcher."""
+    from scoring import score_genres
+    for genre in [None, *GENRE_KEYWORDS]:
+        SentimentAnalyzer(genre)
+    score_genres([[{'rating': 4.0, 'installs_numeric': 1000}]], genres=["warm-up"])
+
+# Heavy components load per STARTUP_WARM_MODE; /health/ready reports when they are warm
+boot = StartupManager()
+boot.add_step("redis", cache.connect, required=READY_REQUIRES_REDIS, background=True,
+              probe=lambda: cache.connected)
+# First, so worker processes boot in parallel with the thread-based steps
+boot.add_step("pdf_renderer", pdf_renderer.warm, probe=lambda: pdf_renderer.is_warm)
+boot.add_step("analysis_engine", warm_analysis_engine)
+if history:
+    # Optional, like Redis: an unwritable database only turns history features off
+    boot.add_step("history", history.open, required=False)
+add_health_endpoints(app, boot)
+
+@app.on_event("startup")
+async def start_workers():
+    jobs.start()
+    await boot.start()  # In lazy mode the PDF pool starts with the first render
+    if WARM_ENABLED:
+        warmer.start()
+
+@app.on_event("shutdown")
+async def close_backends():
+    await boot.stop()
+    await warmer.stop()
+    await jobs.stop()
+    pdf_renderer.shutdown()
+    await cache.close()
+    if history:
+        await history.flush()
+        history.close()
+
+app.add_middleware(CORSMiddleware, allow_origins=origins, allow_methods=["*"], allow_headers=["*"],
+                   expose_headers=["ETag", "Age", "X-Cache", "Server-Timing"])
+# Compress large JSON on the wire; SSE must not be buffered and PDFs are already compressed
+app.add_middleware(SelectiveGZipMiddleware, exclude_paths=["/api/analyze/stream", "/api/generate-pdf"])
 
 # --- DYNAMIC FORECAST LOGIC ---
-def generate_growth_forecast(apps_data: list, opportunity_score: int):
-    """Calculates a 4-month forecast based on actual scraper data."""
-    # Sum up real installs from the top 10 apps found by the scraper
-    total_base_installs = sum(int(app.get('installs_numeric', 5000)) for app in apps_data[:10])
-    
-    months = ["Oct", "Nov", "Dec", "Jan"]
-    multiplier = 1 + (opportunity_score / 100) # Higher opportunity = steeper growth curve
-    base_revenue_per_download = 0.05 # Assume $0.05 revenue per download for the MVP
-    
-    trend = []
-    for i, month in enumerate(months):
-        # Calculate downloads with a growth curve
-        factor = (multiplier ** i) 
-        monthly_downloads = int((total_base_installs / 24) * factor)
-        
-        trend.append({
-            "month": month,
-            "downloads": monthly_downloads,
-            "revenue": int(monthly_downloads * base_revenue_per_download) # Dynamic Revenue
-        })
-    return trend
-
-async def process_analysis(genre: str):
-    """Orchestrates scraper data and formats it for the dashboard."""
-    raw_data = await run_full_analysis(genre)
-    
+def generate_growth_forecast(apps_data: list, opportunity_score: int, months: Optional[int] = None):
+    """Forecasts downloads and revenue for the calendar months ahead, from the scraped installs."""
+    import numpy as np
+    from scoring import FORECAST_MONTHS, forecast, forecast_months, stack_app_metrics, trend_rows
+
+    months = FORECAST_MONTHS if months is None else months
+    _, installs, present = stack_app_metrics([apps_data])
+    downloads, revenue = forecast(installs, present, np.array([opportunity_score]), months)
+    return trend_rows(downloads[0], revenue[0], forecast_months(months))
+
+async def stream_analysis(genre: str, progress=None, lang: str = 'en', country: str = 'us', scraper=None,
+                          offline: bool = False):
+    """Yields dashboard sections as the scraper pipeline produces them, then ('complete', response)."""
+    response = {"genre": genre}
+    apps_data, opportunity_score = [], 0
+
     # Mapping data to dashboard requirements
-    response = {
-        "genre": genre,
-        "metrics": {
-            "opportunity_score": raw_data['opportunity_score'],
-            "saturation_score": raw_data['saturation_score'],
-            "top_apps_count": len(raw_data['play_store_apps']),
-            "search_volume": f"{random.randint(1, 5)}M/mo"
-        },
-        "sentiment_chart_data": [{"complaint": c['category'], "count": c['count']} for c in raw_data['sentiment_data']],
-        "opportunity_matrix": raw_data['competitive_gaps'], 
-        "growth_trend": generate_growth_forecast(raw_data['play_store_apps'], raw_data['opportunity_score']),
-        "recommendations": raw_data.get('recommendations', []),
-        "tech_stack": raw_data.get('tech_stack', []),
-        "aso_keywords": ["smart", "ai", genre],
-        "is_cached": False,
-        "last_updated": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    }
-    return response
+    async for stage, raw_data in iter_analysis(genre, artifacts=artifacts, progress=progress,
+                                              scraper=scraper, lang=lang, country=country,
+                                              history=history, offline=offline):
+        if stage == 'market':
+            apps_data, opportunity_score = raw_data['play_store_apps'], raw_data['opportunity_score']
+            section = {"metrics": {
+                "opportunity_score": raw_data['opportunity_score'],
+                "saturation_score": raw_data['saturation_score'],
+                "top_apps_count": len(raw_data['play_store_apps']),
+                "search_volume": f"{random.randint(1, 5)}M/mo"
+            }}
+            response.update(section)
+            yield "metrics", {"genre": genre, **section}
+        elif stage == 'sentiment':
+            section = {"sentiment_chart_data": [{"complaint": c['category'], "count": c['count']} for c in raw_data['sentiment_data']]}
+            response.update(section)
+            yield "sentiment_chart_data", section
+        elif stage == 'gaps':
+            section = {"opportunity_matrix": raw_data['competitive_gaps']}
+            response.update(section)
+            yield "opportunity_matrix", section
+            section = {"growth_trend": generate_growth_forecast(apps_data, opportunity_score)}
+            response.update(section)
+            yield "growth_trend", section
+        elif stage == 'strategy':
+            section = {
+                "recommendations": raw_data.get('recommendations', []),
+                "tech_stack": raw_data.get('tech_stack', []),
+                "aso_keywords": ["smart", "ai", genre]
+            }
+            response.update(section)
+            yield "recommendations", section
+
+    response["is_cached"] = False
+    response["last_updated"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    yield "complete", response
+
+# One in-flight analysis per genre; expired entries are served stale while one refresh runs
+coordinator = AnalysisCoordinator(cache, stream_analysis)
+# Refreshes popular genres before they expire, within a per-tick budget
+warmer = CacheWarmer(cache, coordinator)
 
 @app.get("/api/analyze")
-async def analyze_market(genre: str = "Productivity"):
-    cached = cache.get_analysis(genre)
-    if cached:
-        cached["is_cached"] = True
-        return cached
-    
+async def analyze_market(request: Request, genre: str = "Productivity"):
+    """Cache hits are answered from the stored ETag and pre-gzipped body (304 on If-None-Match)."""
+    warmer.record_request(genre)
     try:
-        # Pass the string genre to your processor
-        response = await process_analysis(genre)
-        cache.cache_analysis(genre, response)
-        return response
+        cached = await cached_analysis_response(request, cache, coordinator, genre)
+        if cached is not None:
+            return cached
+        result = await coordinator.get(genre)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+    # Tag the result so the next poll can revalidate instead of refetching
+    meta = await cache.get_wire_meta(genre)
+    headers = {"ETag": meta['etag'], "Cache-Control": "no-cache"} if meta else {}
+    if result.get('is_cached'):
+        # A hit that missed the pre-rendered body: same headers as the fast path
+        stale = result['stale_at'] is not None and time.time() > result['stale_at']
+        headers.update(freshness_headers(result['cached_at'], stale))
+    return JSONResponse(result, headers=headers)
 
 @app.get("/api/analyze/refresh")
 async def refresh_market(genre: str = "Productivity"): # Get genre URL
-    """Forced refresh endpoint used by the React button."""
+    """Forced refresh endpoint used by the React button; joins a refresh already in flight."""
+    warmer.record_request(genre)
     try:
-        
-        response = await process_analysis(genre)
-        
-        # Update the cache with the newest results
-        cache.cache_analysis(genre, response)
-        
-        return response
+        return await coordinator.refresh(genre)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/analyze/stream")
+async def stream_market(genre: str = "Productivity", refresh: bool = False):
+    """Server-Sent Events: one event per dashboard section as soon as it is ready.
+
+    Cache hits arrive as a single 'complete' event; an 'error' event ends a failed run.
+    """
+    started = time.perf_counter()
+    warmer.record_request(genre)
+
+    async def events():
+        async for section, data in coordinator.subscribe(genre, refresh=refresh):
+            elapsed_ms = round((time.perf_counter() - started) * 1000, 1)
+            payload = json.dumps({"section": section, "elapsed_ms": elapsed_ms, "data": data})
+            yield f"event: {section}\ndata: {payload}\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@app.get("/api/cache/warming")
+async def warming_status():
+    """Genres kept warm, ordered by refresh priority, with remaining TTL and next refresh time."""
+    status = warmer.status()
+    if not status['genres']:
+        status['genres'] = await warmer.plan()
+    return status
+
+# --- HISTORY: OFFLINE RESCORE & TRENDS ---
+def _require_history(bucket: str = 'day') -> HistoryStore:
+    if history is None:
+        raise HTTPException(status_code=404, detail="History store is disabled (HISTORY_ENABLED=0)")
+    if bucket not in TREND_BUCKETS:
+        raise HTTPException(status_code=400, detail=f"bucket must be one of {', '.join(TREND_BUCKETS)}")
+    return history
+
+@app.get("/api/analyze/rescore")
+async def rescore_market(genre: str = "Productivity", lang: str = 'en', country: str = 'us'):
+    """Re-runs scoring and sentiment on the last stored scrape; makes no Play Store calls."""
+    store = _require_history()
+    if not await store.latest_apps(genre, lang, country):
+        raise HTTPException(status_code=404, detail=f"No stored scrape for '{genre}' yet")
+    async for section, data in stream_analysis(genre, lang=lang, country=country, offline=True):
+        if section == "complete":
+            return {**data, "offline_rescore": True}
+
+@app.get("/api/history/genre")
+async def genre_history(genre: str = "Productivity", lang: str = 'en', country: str = 'us',
+                        days: int = 180, bucket: str = 'day'):
+    store = _require_history(bucket)
+    return {"genre": genre, "bucket": bucket, "trend": await store.genre_trend(genre, lang, country, days, bucket)}
+
+@app.get("/api/history/apps/{app_id}")
+async def app_history(app_id: str, days: int = 180, bucket: str = 'day'):
+    store = _require_history(bucket)
+    return {"app_id": app_id, "bucket": bucket, "trend": await store.app_trend(app_id, days, bucket)}
+
+# --- CROSS-GENRE LEADERBOARD & COMPARISON (stored scrapes, one batched scoring pass) ---
+COMPARE_MAX_GENRES = 20
+
+def _check_months(months: Optional[int]) -> int:
+    from scoring import FORECAST_MONTHS, MAX_FORECAST_MONTHS
+    months = FORECAST_MONTHS if months is None else months
+    if not 1 <= months <= MAX_FORECAST_MONTHS:
+        raise HTTPException(status_code=400, detail=f"months must be between 1 and {MAX_FORECAST_MONTHS}")
+    return months
+
+@app.get("/api/leaderboard")
+async def genre_leaderboard(sort: str = 'opportunity', limit: int = 50, months: Optional[int] = None,
+                            lang: str = 'en', country: str = 'us'):
+    """Ranks every genre with a stored scrape; no scraping, so hundreds of genres rank in milliseconds."""
+    from scoring import LEADERBOARD_SORTS, leaderboard
+
+    store = _require_history()
+    if sort not in LEADERBOARD_SORTS:
+        raise HTTPException(status_code=400, detail=f"sort must be one of {', '.join(LEADERBOARD_SORTS)}")
+    months = _check_months(months)
+    snapshots = await store.latest_snapshots(lang, country)
+    started = time.perf_counter()
+    ranked = leaderboard(list(snapshots), [s['apps'] for s in snapshots.values()], sort, limit, months)
+    return {"sort": sort, "months": months, "genres_ranked": len(snapshots),
+            "scoring_ms": round((time.perf_counter() - started) * 1000, 2), "leaderboard": ranked}
+
+@app.get("/api/compare")
+async def compare_genres(genres: str, months: Optional[int] = None, lang: str = 'en', country: str = 'us'):
+    """Side-by-side metrics, gap matrices and forecasts for comma-separated genres, from stored scrapes."""
+    from scoring import features_for, forecast_months, score_genres, trend_rows
+
+    store = _require_history()
+    months = _check_months(months)
+    names = list(dict.fromkeys(g.strip() for g in genres.split(",") if g.strip()))
+    if not 1 <= len(names) <= COMPARE_MAX_GENRES:
+        raise HTTPException(status_code=400, detail=f"Compare between 1 and {COMPARE_MAX_GENRES} genres")
+    snapshots = await store.latest_snapshots(lang, country, names)
+    found = [g for g in names if g.lower() in snapshots]
+    app_lists = [snapshots[g.lower()]['apps'] for g in found]
+
+    # Same pain factor as a live analysis: complaints in the stored reviews of each genre's top 3 apps
+    pains = []
+    for genre, apps in zip(found, app_lists):
+        reviews = [r for a in apps[:3] for r in await store.reviews(a['app_id'], lang, country, NEGATIVE_SCORES)]
+        complaints = {c['category']: c['count'] for c in SentimentAnalyzer(genre).analyze_reviews(reviews)}
+        pains.append((complaints.get('Bugs/Crashes', 0) + complaints.get('Missing Features', 0)) // 2)
+
+    scores = score_genres(app_lists, pains, found, months)
+    calendar = forecast_months(months)
+    comparison = [{
+        "genre": genre,
+        "metrics": {"opportunity_score": int(scores['opportunity'][g]), "saturation_score": int(scores['saturation'][g]),
+                    "avg_rating": round(float(scores['avg_rating'][g]), 2), "top_apps_count": int(scores['apps'][g])},
+        "opportunity_matrix": [{"feature": f, "market": int(m), "opportunity": int(o)} for f, m, o in
+                               zip(features_for(genre), scores['gap_market'][g], scores['gap_opportunity'][g])],
+        "growth_trend": trend_rows(scores['downloads'][g], scores['revenue'][g], calendar),
+        "scraped_at": snapshots[genre.lower()]['scraped_at']
+    } for g, genre in enumerate(found)]
+    return {"months": months, "genres": comparison, "missing": [g for g in names if g not in found]}
+
+# --- BACKGROUND ANALYSIS JOBS (202 + poll) ---
+async def run_analysis_job(genre: str, refresh: bool = False, progress=None):
+    if refresh:
+        return await coordinator.refresh(genre, progress)
+    return await coordinator.get(genre, progress)
+
+job_store = JobStore(cache)
+jobs = JobManager(job_store, run_analysis_job)
+
+@app.post("/api/jobs/analyze", status_code=202)
+async def submit_analysis_job(genre: str = "Productivity", refresh: bool = False):
+    """Queues an analysis and returns its job id immediately; duplicate genres share one job."""
+    warmer.record_request(genre)
+    try:
+        job = await jobs.submit(genre, refresh=refresh)
+    except JobQueueFull as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": "30"})
+    return {**job, "status_url": f"/api/jobs/{job['job_id']}", "result_url": f"/api/jobs/{job['job_id']}/result"}
+
+@app.get("/api/jobs/{job_id}")
+async def job_status(job_id: str):
+    job = await jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired job")
+    return job
+
+@app.get("/api/jobs/{job_id}/result")
+async def job_result(job_id: str):
+    job = await jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired job")
+    if job['status'] == 'failed':
+        raise HTTPException(status_code=500, detail=job['error'])
+    if job['status'] != 'done':
+        return JSONResponse(status_code=202, content=job)
+    return await jobs.result(job_id)
+# --- BATCH MARKET SWEEPS ---
+batches = BatchAnalyzer(coordinator, job_store, artifacts)
+
+class BatchItem(BaseModel):
+    genre: str
+    lang: str = "en"
+    country: str = "us"
+
+class BatchRequest(BaseModel):
+    genres: List[str] = []
+    items: List[BatchItem] = []
+    refresh: bool = True
+    # Up to the server's cap; the upstream rate budget is server-side only (BATCH_RATE_PER_SECOND)
+    concurrency: int = Field(BATCH_CONCURRENCY, ge=1, le=BATCH_CONCURRENCY)
+
+@app.post("/api/analyze/batch", status_code=202)
+async def submit_batch(request: BatchRequest):
+    """Analyzes many genres on one shared scheduler; poll the batch for per-genre timings."""
+    items = [{"genre": g} for g in request.genres] + [item.model_dump() for item in request.items]
+    if not items:
+        raise HTTPException(status_code=422, detail="Provide at least one genre")
+    if len(items) > BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=422, detail=f"A batch holds at most {BATCH_MAX_ITEMS} genres")
+    return await batches.submit(items, refresh=request.refresh, concurrency=request.concurrency)
+
+@app.get("/api/analyze/batch/{batch_id}")
+async def batch_status(batch_id: str):
+    summary = await batches.get(batch_id)
+    if summary is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired batch")
+    return summary
+
+def _attachment(filename: str) -> str:
+    """Content-Disposition for a client-supplied name: a plain ASCII fallback plus the UTF-8 original."""
+    fallback = re.sub(r'[^\x20-\x7e]|["\\]', '_', filename)
+    return f"attachment; filename=\"{fallback}\"; filename*=utf-8''{quote(filename)}"
+
 @app.post("/api/generate-pdf")
 async def generate_pdf(data: dict):
-    """Generates the blueprint report."""
-    from pdf_generator import MVPBlueprintGenerator
-    generator = MVPBlueprintGenerator()
-    
-    
-    with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as tmp:
-        try:
-            generator.generate_report(data, tmp.name)
-            return FileResponse(
-                tmp.name, 
-                media_type='application/pdf', 
-                filename=f"Blueprint_{data.get('genre', 'Analysis')}.pdf"
-            )
-        except Exception as e:
-            raise HTTPException(status_code=500, detail=str(e))
+    """Generates the blueprint report on the warm render pool and returns it from memory."""
+    try:
+        pdf_bytes = await pdf_renderer.render(data)
+    except RenderQueueFull as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"})
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    return Response(
+        content=pdf_bytes,
+        media_type='application/pdf',
+        headers={"Content-Disposition": _attachment(f"Blueprint_{data.get('genre') or 'Analysis'}.pdf")}
+    )
+
+boot.mark('imports')  # Module loaded: every route and backend object is defined
 
 if __name__ == "__main__":
     uvicorn.run(app, host="127.0.0.1", port=8000)
\ No newline at end of file
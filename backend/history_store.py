@@ -0,0 +1,268 @@
+import asyncio
+import os
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Awaitable, Dict, List, Optional, Sequence
+
+from redis_cache_layer import normalize_genre
+from scraper import NEGATIVE_SCORES
+
+HISTORY_ENABLED = os.getenv("HISTORY_ENABLED", "1") == "1"
+HISTORY_DB_PATH = os.getenv("HISTORY_DB_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                                            "genregenius_history.db"))
+TREND_BUCKETS = {'day': 86400, 'week': 7 * 86400, 'month': 30 * 86400}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS apps (
+    app_id TEXT PRIMARY KEY,
+    title TEXT,
+    description TEXT,
+    icon TEXT,
+    updated_at REAL NOT NULL
+);
+-- One row per app per analysis; `day` is precomputed so trend queries group on an index
+CREATE TABLE IF NOT EXISTS app_snapshots (
+    app_id TEXT NOT NULL,
+    genre TEXT NOT NULL,
+    lang TEXT NOT NULL,
+    country TEXT NOT NULL,
+    scraped_at REAL NOT NULL,
+    day INTEGER NOT NULL,
+    rank INTEGER NOT NULL,
+    rating REAL,
+    installs INTEGER,
+    PRIMARY KEY (genre, lang, country, scraped_at, app_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_snapshots_app ON app_snapshots (app_id, day, rating, installs);
+CREATE TABLE IF NOT EXISTS reviews (
+    app_id TEXT NOT NULL,
+    lang TEXT NOT NULL,
+    country TEXT NOT NULL,
+    review_id TEXT NOT NULL,
+    at TEXT NOT NULL,
+    score INTEGER NOT NULL,
+    content TEXT NOT NULL,
+    scraped_at REAL NOT NULL,
+    PRIMARY KEY (app_id, lang, country, review_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_reviews_newest ON reviews (app_id, lang, country, at DESC);
+"""
+
+class HistoryStore:
+    """Embedded SQLite history of scraped app snapshots and review batches.
+
+    Every analysis appends one snapshot row per app (indexed by app_id, genre and scrape
+    time) and upserts its reviews, so installs and ratings can be charted over months
+    and analyses can be re-scored offline. All access runs on one worker thread:
+    SQLite serializes writers anyway, and the event loop never blocks on disk.
+    """
+    def __init__(self, path: str = HISTORY_DB_PATH):
+        self.path = path
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="history")
+        self._conn: Optional[sqlite3.Connection] = None
+        self._pending = set()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.row_factory = sqlite3.Row
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(_SCHEMA)
+        return self._conn
+
+    def record_later(self, write: Awaitable) -> asyncio.Future:
+        """Runs a record_* coroutine as a background task, so the analysis never waits on disk."""
+        task = asyncio.ensure_future(write)
+        self._pending.add(task)  # The loop holds tasks weakly
+        task.add_done_callback(self._pending.discard)
+        return task
+
+    async def flush(self):
+        """Waits for writes scheduled with record_later; called before close."""
+        await asyncio.gather(*self._pending, return_exceptions=True)
+
+    async def _run(self, func, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, func, *args)
+
+    async def open(self) -> bool:
+        """Opens the database and applies the schema ahead of the first write."""
+        try:
+            await self._run(self._connect)
+        except sqlite3.Error as e:
+            print(f"⚠️ History store unavailable ({e})")
+            return False
+        return True
+
+    # --- WRITES ---
+    def _record_apps(self, genre: str, lang: str, country: str, apps: List[Dict], scraped_at: float):
+        conn = self._connect()
+        with conn:
+            conn.executemany(
+                "INSERT INTO apps (app_id, title, description, icon, updated_at) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT(app_id) DO UPDATE SET title=excluded.title, description=excluded.description, "
+                "icon=excluded.icon, updated_at=excluded.updated_at",
+                [(a['app_id'], a.get('title'), a.get('description'), a.get('icon'), scraped_at) for a in apps]
+            )
+            conn.executemany(
+                "INSERT OR REPLACE INTO app_snapshots VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [(a['app_id'], normalize_genre(genre), lang, country, scraped_at, int(scraped_at // 86400), rank,
+                  a.get('rating'), a.get('installs_numeric')) for rank, a in enumerate(apps)]
+            )
+
+    async def record_apps(self, genre: str, lang: str, country: str, apps: List[Dict],
+                          scraped_at: Optional[float] = None):
+        """Upserts app metadata and appends one snapshot of the genre's ranked app list."""
+        if apps:
+            try:
+                await self._run(self._record_apps, genre, lang, country, apps, scraped_at or time.time())
+            except sqlite3.Error as e:
+                print(f"⚠️ History write failed for '{genre}': {e}")
+
+    def _record_reviews(self, app_id: str, lang: str, country: str, reviews: List[Dict], scraped_at: float):
+        conn = self._connect()
+        with conn:
+            # Review ids are stable upstream, so re-swept reviews are skipped, not duplicated
+            conn.executemany(
+                "INSERT OR IGNORE INTO reviews VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [(app_id, lang, country, r['review_id'] or f"{r['at']}:{r['content'][:40]}", r['at'],
+                  r['score'], r['content'], scraped_at) for r in reviews]
+            )
+
+    async def record_reviews(self, app_id: str, lang: str, country: str, reviews: List[Dict]):
+        if reviews:
+            try:
+                await self._run(self._record_reviews, app_id, lang, country, reviews, time.time())
+            except sqlite3.Error as e:
+                print(f"⚠️ History write failed for {app_id} reviews: {e}")
+
+    # --- READS ---
+    def _latest_apps(self, genre: str, lang: str, country: str) -> List[Dict]:
+        rows = self._connect().execute(
+            "SELECT s.app_id, a.title, s.rating, s.installs, a.description, a.icon FROM app_snapshots s "
+            "JOIN apps a USING (app_id) WHERE s.genre = ? AND s.lang = ? AND s.country = ? AND s.scraped_at = ("
+            "  SELECT MAX(scraped_at) FROM app_snapshots WHERE genre = ? AND lang = ? AND country = ?"
+            ") ORDER BY s.rank",
+            (normalize_genre(genre), lang, country) * 2
+        ).fetchall()
+        return [{'app_id': r['app_id'], 'title': r['title'], 'rating': r['rating'], 'installs_numeric': r['installs'],
+                 'description': r['description'] or '', 'icon': r['icon'] or ''} for r in rows]
+
+    async def latest_apps(self, genre: str, lang: str = 'en', country: str = 'us') -> List[Dict]:
+        """The genre's most recent app list, shaped like PlayStoreScraper.search_genre output."""
+        return await self._run(self._latest_apps, genre, lang, country)
+
+    def _latest_snapshots(self, lang: str, country: str, genres: Optional[Sequence[str]]) -> Dict[str, Dict]:
+        query = ("SELECT s.genre, s.scraped_at, s.app_id, s.rating, s.installs FROM app_snapshots s JOIN ("
+                 "  SELECT genre, MAX(scraped_at) AS latest FROM app_snapshots WHERE lang = ? AND country = ?")
+        params: list = [lang, country]
+        if genres is not None:
+            query += f" AND genre IN ({','.join('?' * len(genres))})"
+            params.extend(normalize_genre(g) for g in genres)
+        query += ("  GROUP BY genre"
+                  ") l ON s.genre = l.genre AND s.scraped_at = l.latest "
+                  "WHERE s.lang = ? AND s.country = ? ORDER BY s.genre, s.rank")
+        snapshots: Dict[str, Dict] = {}
+        for r in self._connect().execute(query, (*params, lang, country)):
+            snapshot = snapshots.setdefault(r['genre'], {'scraped_at': r['scraped_at'], 'apps': []})
+            snapshot['apps'].append({'app_id': r['app_id'], 'rating': r['rating'], 'installs_numeric': r['installs']})
+        return snapshots
+
+    async def latest_snapshots(self, lang: str = 'en', country: str = 'us',
+                               genres: Optional[Sequence[str]] = None) -> Dict[str, Dict]:
+        """Latest app metrics of every stored genre (or just `genres`), keyed by normalized genre."""
+        return await self._run(self._latest_snapshots, lang, country, tuple(genres) if genres is not None else None)
+
+    def _reviews(self, app_id: str, lang: str, country: str, scores: Sequence[int], limit: int) -> List[Dict]:
+        query = "SELECT review_id, content, score, at FROM reviews WHERE app_id = ? AND lang = ? AND country = ?"
+        params: list = [app_id, lang, country]
+        if scores:
+            query += f" AND score IN ({','.join('?' * len(scores))})"
+            params.extend(scores)
+        rows = self._connect().execute(query + " ORDER BY at DESC LIMIT ?", (*params, limit)).fetchall()
+        return [dict(r) for r in rows]
+
+    async def reviews(self, app_id: str, lang: str = 'en', country: str = 'us',
+                      scores: Sequence[int] = (), limit: int = 40) -> List[Dict]:
+        """Newest stored reviews for an app, optionally limited to some star ratings."""
+        return await self._run(self._reviews, app_id, lang, country, tuple(scores), limit)
+
+    def _app_trend(self, app_id: str, since_day: int, bucket_days: int) -> List[Dict]:
+        rows = self._connect().execute(
+            "SELECT (day / ?) * ? AS bucket, AVG(rating) AS rating, MAX(installs) AS installs, COUNT(*) AS samples "
+            "FROM app_snapshots WHERE app_id = ? AND day >= ? GROUP BY bucket ORDER BY bucket",
+            (bucket_days, bucket_days, app_id, since_day)
+        ).fetchall()
+        return [{'date': time.strftime('%Y-%m-%d', time.gmtime(r['bucket'] * 86400)),
+                 'rating': round(r['rating'], 3) if r['rating'] is not None else None,
+                 'installs': r['installs'], 'samples': r['samples']} for r in rows]
+
+    async def app_trend(self, app_id: str, days: int = 180, bucket: str = 'day') -> List[Dict]:
+        """Rating and installs per day/week/month for one app over the last `days`."""
+        since_day = int(time.time() // 86400) - days
+        return await self._run(self._app_trend, app_id, since_day, TREND_BUCKETS[bucket] // 86400)
+
+    def _genre_trend(self, genre: str, lang: str, country: str, since_day: int, bucket_days: int) -> List[Dict]:
+        # Average over each snapshot first, so genres refreshed more often do not weigh more
+        rows = self._connect().execute(
+            "SELECT (day / ?) * ? AS bucket, AVG(avg_rating) AS avg_rating, AVG(total_installs) AS total_installs, "
+            "AVG(apps) AS apps, COUNT(*) AS snapshots FROM ("
+            "  SELECT day, AVG(rating) AS avg_rating, SUM(installs) AS total_installs, COUNT(*) AS apps "
+            "  FROM app_snapshots WHERE genre = ? AND lang = ? AND country = ? AND scraped_at >= ? GROUP BY scraped_at"
+            ") GROUP BY bucket ORDER BY bucket",
+            (bucket_days, bucket_days, normalize_genre(genre), lang, country, since_day * 86400)
+        ).fetchall()
+        return [{'date': time.strftime('%Y-%m-%d', time.gmtime(r['bucket'] * 86400)),
+                 'avg_rating': round(r['avg_rating'], 3) if r['avg_rating'] is not None else None,
+                 'total_installs': int(r['total_installs'] or 0), 'apps': round(r['apps'], 1),
+                 'snapshots': r['snapshots']} for r in rows]
+
+    async def genre_trend(self, genre: str, lang: str = 'en', country: str = 'us',
+                          days: int = 180, bucket: str = 'day') -> List[Dict]:
+        """Average rating and total installs of a genre's top apps per day/week/month."""
+        since_day = int(time.time() // 86400) - days
+        return await self._run(self._genre_trend, genre, lang, country, since_day, TREND_BUCKETS[bucket] // 86400)
+
+    def _stats(self) -> Dict:
+        conn = self._connect()
+        count = lambda table: conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+        return {'path': self.path, 'apps': count('apps'), 'snapshots': count('app_snapshots'),
+                'reviews': count('reviews')}
+
+    async def stats(self) -> Dict:
+        return await self._run(self._stats)
+
+    def replay(self, lang: str = 'en', country: str = 'us') -> 'StoredScraper':
+        return StoredScraper(self, lang, country)
+
+    def close(self):
+        def _close():
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+        self._executor.submit(_close).result()
+        self._executor.shutdown(wait=True)
+
+class StoredScraper:
+    """Stands in for PlayStoreScraper in iter_analysis, answering only from the store.
+
+    Used for offline re-scoring: the same pipeline runs with zero network calls.
+    """
+    def __init__(self, store: HistoryStore, lang: str = 'en', country: str = 'us'):
+        self.store = store
+        self.lang = lang
+        self.country = country
+
+    def for_region(self, lang: str, country: str) -> 'StoredScraper':
+        return StoredScraper(self.store, lang, country)
+
+    async def search_genre(self, genre: str, limit: int = 10, progress=None) -> List[Dict]:
+        apps = await self.store.latest_apps(genre, self.lang, self.country)
+        if progress: progress('details')
+        return apps[:limit]
+
+    async def scrape_reviews(self, app_id: str, max_reviews: int = 40, scores: Sequence[int] = NEGATIVE_SCORES,
+                             max_pages: int = 0) -> List[Dict]:
+        return await self.store.reviews(app_id, self.lang, self.country, scores, max_reviews)
@@ -0,0 +1,80 @@
+import gzip
+import os
+import time
+from typing import Dict, Iterable, Optional
+
+from fastapi import Request
+from fastapi.responses import Response
+from starlette.middleware.gzip import GZipMiddleware
+
+from analysis_coordinator import AnalysisCoordinator
+from redis_cache_layer import MarketAnalysisCache, analysis_id
+
+GZIP_MIN_SIZE = int(os.getenv("HTTP_GZIP_MIN_SIZE", "1024"))
+GZIP_LEVEL = int(os.getenv("HTTP_GZIP_LEVEL", "5"))
+
+class SelectiveGZipMiddleware:
+    """GZipMiddleware for JSON APIs, skipping paths it would hurt.
+
+    Starlette buffers gzip output, which would hold back Server-Sent Events, and
+    PDFs are already compressed. Responses that set Content-Encoding themselves
+    (pre-compressed cache hits) are passed through untouched by GZipMiddleware.
+    """
+    def __init__(self, app, exclude_paths: Iterable[str] = (), minimum_size: int = GZIP_MIN_SIZE,
+                 compresslevel: int = GZIP_LEVEL):
+        self.app = app
+        self.gzip = GZipMiddleware(app, minimum_size=minimum_size, compresslevel=compresslevel)
+        self.exclude_paths = frozenset(exclude_paths)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["path"] in self.exclude_paths:
+            await self.app(scope, receive, send)
+        else:
+            await self.gzip(scope, receive, send)
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison as used for If-None-Match (RFC 9110 13.1.2)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in if_none_match.split(","))
+
+def accepts_gzip(request: Request) -> bool:
+    return "gzip" in request.headers.get("accept-encoding", "").lower()
+
+def freshness_headers(cached_at: Optional[float], is_stale: bool) -> Dict[str, str]:
+    """Age and X-Cache (HIT or STALE) for a cache hit."""
+    headers = {"X-Cache": "STALE" if is_stale else "HIT"}
+    if cached_at is not None:
+        headers["Age"] = str(max(0, int(time.time() - cached_at)))
+    return headers
+
+async def cached_analysis_response(request: Request, cache: MarketAnalysisCache, coordinator: AnalysisCoordinator,
+                                   genre: str, lang: str = 'en', country: str = 'us') -> Optional[Response]:
+    """Serves a cache hit from its stored ETag and pre-gzipped body, or None to fall back to a full lookup.
+
+    A matching If-None-Match gets a 304 and the payload is never read. Otherwise the
+    stored bytes go out as-is (or are gunzipped for the rare client without gzip).
+    The body carries only fixed timestamps (cached_at, stale_at), so it stays
+    byte-identical for the entry's whole life; Age and X-Cache repeat them as headers.
+    """
+    meta = await coordinator.cached_version(genre, lang, country)
+    if meta is None:
+        return None
+    headers = {
+        "ETag": meta['etag'],
+        **freshness_headers(meta['cached_at'], meta['is_stale']),
+        "Cache-Control": "no-cache",  # Browsers keep the body and revalidate with If-None-Match
+        "Vary": "Accept-Encoding",
+    }
+    if etag_matches(request.headers.get("if-none-match"), meta['etag']):
+        return Response(status_code=304, headers=headers)
+
+    body = await cache.get_wire_body(analysis_id(genre, lang, country))
+    if body is None:
+        return None
+    if accepts_gzip(request):
+        return Response(body, media_type="application/json", headers={**headers, "Content-Encoding": "gzip"})
+    return Response(gzip.decompress(body), media_type="application/json", headers=headers)
@@ -0,0 +1,144 @@
+import asyncio
+import os
+import time
+import uuid
+from typing import Awaitable, Callable, Dict, Optional
+
+from redis_cache_layer import LRUCache, MarketAnalysisCache, normalize_genre
+from scraper import ANALYSIS_STAGES
+
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+JOB_QUEUE_LIMIT = int(os.getenv("JOB_QUEUE_LIMIT", "50"))
+JOB_TTL = int(os.getenv("JOB_TTL", "3600"))  # How long finished jobs and their results stay pollable
+
+class JobQueueFull(Exception):
+    """Raised when the analysis queue is at its backpressure limit."""
+
+class JobStore:
+    """Job records in the analysis cache's Redis, mirrored in-process for when Redis is down."""
+    def __init__(self, backend: MarketAnalysisCache, ttl: int = JOB_TTL):
+        self.backend = backend
+        self.ttl = ttl
+        self.local = LRUCache(max_entries=4096, ttl=ttl)
+
+    async def get(self, key: str) -> Optional[Dict]:
+        value = await self.backend.get_value(key)
+        return value if value is not None else self.local.get(key)
+
+    async def set(self, key: str, value):
+        self.local.set(key, value)
+        await self.backend.set_value(key, value, self.ttl)
+
+    async def claim(self, key: str, value: str) -> Optional[str]:
+        """Sets key only if absent (across workers when Redis is up); returns the existing value otherwise."""
+        if await self.backend.set_if_absent(key, value, self.ttl):
+            self.local.set(key, value)
+            return None
+        existing = await self.get(key)
+        if existing is None:
+            # Redis is down: fall back to this process's view
+            self.local.set(key, value)
+        return existing
+
+class JobManager:
+    """Bounded background queue of market analyses with per-stage progress.
+
+    Submitting returns at once with a job id; workers run the analysis and clients
+    poll. A genre with an active job reuses that job instead of queueing another.
+    """
+    def __init__(self, store: JobStore, run: Callable[..., Awaitable[Dict]],
+                 workers: int = JOB_WORKERS, max_queue: int = JOB_QUEUE_LIMIT):
+        self.store = store
+        self.run = run
+        self.workers = workers
+        self.max_queue = max_queue
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks = []
+
+    @staticmethod
+    def _job_key(job_id: str) -> str:
+        return f"genregenius:job:{job_id}"
+
+    @staticmethod
+    def _genre_key(genre: str) -> str:
+        return f"genregenius:job-genre:{normalize_genre(genre)}"
+
+    @property
+    def queue(self) -> asyncio.Queue:
+        # Created lazily: on 3.9 a Queue binds to the loop current at construction, and the
+        # manager is built at import time, before uvicorn starts its loop
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self.max_queue)
+        return self._queue
+
+    def start(self):
+        if not self._tasks:
+            self._tasks = [asyncio.ensure_future(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def submit(self, genre: str, refresh: bool = False) -> Dict:
+        """Queues an analysis, or returns the genre's active job if one exists."""
+        job_id = uuid.uuid4().hex
+        existing_id = await self.store.claim(self._genre_key(genre), job_id)
+        if existing_id is not None:
+            existing = await self.get(existing_id) if existing_id else None
+            if existing and existing['status'] in ('queued', 'running'):
+                return existing
+            # The previous job for this genre has finished; take the slot over
+            await self.store.set(self._genre_key(genre), job_id)
+
+        if self.queue.full():
+            await self.store.set(self._genre_key(genre), "")
+            raise JobQueueFull(f"{self.queue.qsize()} analyses already queued")
+
+        job = {
+            'job_id': job_id, 'genre': genre, 'refresh': refresh, 'status': 'queued',
+            'stage': None, 'stages': list(ANALYSIS_STAGES), 'progress': 0.0,
+            'submitted_at': time.time(), 'started_at': None, 'finished_at': None, 'error': None
+        }
+        await self.store.set(self._job_key(job_id), job)
+        self.queue.put_nowait(job)
+        return job
+
+    async def get(self, job_id: str) -> Optional[Dict]:
+        return await self.store.get(self._job_key(job_id))
+
+    async def result(self, job_id: str) -> Optional[Dict]:
+        return await self.store.get(f"{self._job_key(job_id)}:result")
+
+    async def _save(self, job: Dict):
+        await self.store.set(self._job_key(job['job_id']), dict(job))
+
+    async def _worker(self):
+        while True:
+            job = await self.queue.get()
+            try:
+                await self._execute(job)
+            finally:
+                self.queue.task_done()
+
+    async def _execute(self, job: Dict):
+        job.update(status='running', started_at=time.time())
+        await self._save(job)
+        pending_saves = []
+
+        def progress(stage: str):
+            job['stage'] = stage
+            job['progress'] = round(ANALYSIS_STAGES.index(stage) / len(ANALYSIS_STAGES), 2)
+            pending_saves.append(asyncio.ensure_future(self._save(job)))
+
+        try:
+            result = await self.run(job['genre'], refresh=job['refresh'], progress=progress)
+            await self.store.set(f"{self._job_key(job['job_id'])}:result", result)
+            job.update(status='done', stage=None, progress=1.0)
+        except Exception as e:
+            job.update(status='failed', error=str(e))
+        job['finished_at'] = time.time()
+        await asyncio.gather(*pending_saves, return_exceptions=True)
+        await self._save(job)
+        await self.store.set(self._genre_key(job['genre']), "")
@@ -0,0 +1,157 @@
+import os
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from threading import Lock
+from typing import Dict, List, Optional, Tuple
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") == "1"
+SERVER_TIMING = os.getenv("METRICS_SERVER_TIMING", "1") == "1"  # Per-request breakdown in a response header
+
+# Seconds: from L1/Redis lookups (sub-ms) up to full cold scrapes
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+def _labels(labels: Dict[str, str]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _format_labels(key: LabelKey, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(key) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+class CounterMetric:
+    def __init__(self, name: str, help: str):
+        self.name, self.help, self.type = name, help, "counter"
+        self.values: Dict[LabelKey, float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        if METRICS_ENABLED:
+            key = _labels(labels)
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def render(self) -> List[str]:
+        return [f"{self.name}{_format_labels(key)} {value}" for key, value in self.values.items()]
+
+class HistogramMetric:
+    """Fixed-bucket histogram: one bisect and two additions per observation."""
+    def __init__(self, name: str, help: str, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.name, self.help, self.type = name, help, "histogram"
+        self.buckets = buckets
+        self.values: Dict[LabelKey, list] = {}  # [per-bucket counts..., +Inf count, sum]
+        self._lock = Lock()  # Observations may come from executor threads
+
+    def observe(self, value: float, **labels):
+        if not METRICS_ENABLED:
+            return
+        key = _labels(labels)
+        with self._lock:
+            series = self.values.get(key)
+            if series is None:
+                series = self.values[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[bisect_left(self.buckets, value)] += 1
+            series[-1] += value
+
+    def render(self) -> List[str]:
+        lines = []
+        for key, series in self.values.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_format_labels(key, ('le', str(bound)))} {cumulative}")
+            cumulative += series[len(self.buckets)]
+            lines.append(f"{self.name}_bucket{_format_labels(key, ('le', '+Inf'))} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(key)} {series[-1]}")
+            lines.append(f"{self.name}_count{_format_labels(key)} {cumulative}")
+        return lines
+
+class MetricsRegistry:
+    def __init__(self):
+        self.metrics: Dict[str, object] = {}
+
+    def counter(self, name: str, help: str) -> CounterMetric:
+        return self.metrics.setdefault(name, CounterMetric(name, help))
+
+    def histogram(self, name: str, help: str, buckets: Tuple[float, ...] = LATENCY_BUCKETS) -> HistogramMetric:
+        return self.metrics.setdefault(name, HistogramMetric(name, help, buckets))
+
+    def render(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)."""
+        lines = []
+        for metric in self.metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+registry = MetricsRegistry()
+
+STAGE_SECONDS = registry.histogram("genregenius_stage_seconds", "Duration of analysis pipeline stages.")
+UPSTREAM_SECONDS = registry.histogram("genregenius_upstream_seconds", "Duration of google_play_scraper calls.")
+UPSTREAM_REQUESTS = registry.counter("genregenius_upstream_requests_total", "google_play_scraper calls by outcome.")
+REDIS_SECONDS = registry.histogram("genregenius_redis_seconds", "Duration of Redis commands.")
+CACHE_REQUESTS = registry.counter("genregenius_cache_requests_total", "Cache lookups by cache and result.")
+CACHE_PAYLOAD_BYTES = registry.histogram("genregenius_cache_payload_bytes", "Encoded size of values written to Redis.",
+                                         SIZE_BUCKETS)
+RENDER_SECONDS = registry.histogram("genregenius_render_seconds", "Chart and PDF render durations.")
+HTTP_SECONDS = registry.histogram("genregenius_http_request_seconds", "HTTP request duration by route.")
+STARTUP_SECONDS = registry.histogram("genregenius_startup_seconds", "Boot phases and warm-up step durations.")
+
+# --- PER-REQUEST BREAKDOWN (Server-Timing) ---
+_request_timings: ContextVar[Optional[Dict[str, float]]] = ContextVar("request_timings", default=None)
+
+def start_request_timings() -> Dict[str, float]:
+    """Collects this request's spans; tasks spawned from it share the same dict."""
+    timings: Dict[str, float] = {}
+    _request_timings.set(timings)
+    return timings
+
+def record_timing(name: str, seconds: float):
+    timings = _request_timings.get()
+    if timings is not None:
+        timings[name] = timings.get(name, 0.0) + seconds
+
+def server_timing_header(timings: Dict[str, float]) -> str:
+    return ", ".join(f"{name.replace(' ', '_')};dur={seconds * 1000:.1f}" for name, seconds in timings.items())
+
+@contextmanager
+def span(stage: str):
+    """Times a pipeline stage into STAGE_SECONDS and the current request's breakdown."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        STAGE_SECONDS.observe(elapsed, stage=stage)
+        record_timing(stage, elapsed)
+
+def add_metrics_endpoint(app):
+    """Registers GET /metrics and the middleware that times every request."""
+    from fastapi import Request
+    from fastapi.responses import Response
+
+    @app.middleware("http")
+    async def time_request(request: Request, call_next):
+        timings = start_request_timings()
+        started = time.perf_counter()
+        response = await call_next(request)
+        elapsed = time.perf_counter() - started
+        route = request.scope.get("route")
+        HTTP_SECONDS.observe(elapsed, method=request.method, route=getattr(route, "path", "unmatched"),
+                             status=response.status_code)
+        if SERVER_TIMING:
+            # Streaming responses send headers first, so only spans finished by then appear
+            timings["total"] = elapsed
+            response.headers["Server-Timing"] = server_timing_header(timings)
+        return response
+
+    @app.get("/metrics")
+    async def metrics():
+        return Response(registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
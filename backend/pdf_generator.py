@@ -8,13 +8,13 @@ from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import inch
 from reportlab.lib.enums import TA_CENTER, TA_LEFT
 import io
+import time
 import numpy as np
-import matplotlib.pyplot as plt
-import matplotlib
-from typing import Dict, List
+from matplotlib.figure import Figure
+from typing import BinaryIO, Dict, List, Optional, Tuple, Union
 
-# Ensure server-side rendering without a GUI
-matplotlib.use('Agg')
+# Charts use the object-oriented Figure API: no pyplot global state, so renders
+# never leak figures or interfere with each other, and no GUI backend is needed.
 
 class MVPBlueprintGenerator:
     def __init__(self):
@@ -53,22 +53,22 @@ class MVPBlueprintGenerator:
         coverage += coverage[:1]
         opportunity += opportunity[:1]
         
-        fig, ax = plt.subplots(figsize=(6, 6), subplot_kw=dict(polar=True))
+        fig = Figure(figsize=(6, 6))
+        ax = fig.add_subplot(projection='polar')
         fig.patch.set_facecolor('#F8FAFC')
-        plt.xticks(angles[:-1], categories, color='#475569', size=10, fontweight='bold')
+        ax.set_xticks(angles[:-1], categories, color='#475569', size=10, fontweight='bold')
         ax.set_rlabel_position(0)
-        plt.yticks([25, 50, 75, 100], ["25", "50", "75", "100"], color="#94A3B8", size=8)
-        plt.ylim(0, 100)
+        ax.set_yticks([25, 50, 75, 100], ["25", "50", "75", "100"], color="#94A3B8", size=8)
+        ax.set_ylim(0, 100)
         
         ax.plot(angles, coverage, linewidth=2, color='#EF4444', label='Market Coverage')
         ax.fill(angles, coverage, '#EF4444', alpha=0.25)
         ax.plot(angles, opportunity, linewidth=2, color='#10B981', label='Opportunity')
         ax.fill(angles, opportunity, '#10B981', alpha=0.3)
         
-        plt.legend(loc='upper right', bbox_to_anchor=(1.3, 1.1))
+        ax.legend(loc='upper right', bbox_to_anchor=(1.3, 1.1))
         img_buffer = io.BytesIO()
-        plt.savefig(img_buffer, format='png', dpi=150, bbox_inches='tight')
-        plt.close()
+        fig.savefig(img_buffer, format='png', dpi=150, bbox_inches='tight')
         img_buffer.seek(0)
         return img_buffer
 
@@ -77,16 +77,16 @@ class MVPBlueprintGenerator:
         labels = [d['complaint'] for d in data]
         counts = [d['count'] for d in data]
         
-        fig, ax = plt.subplots(figsize=(6, 4))
+        fig = Figure(figsize=(6, 4))
+        ax = fig.add_subplot()
         fig.patch.set_facecolor('#F8FAFC')
         ax.barh(labels, counts, color='#F43F5E', alpha=0.8)
         ax.set_xlabel('Complaint Frequency')
         ax.invert_yaxis()
-        plt.tight_layout()
+        fig.tight_layout()
         
         img_buffer = io.BytesIO()
-        plt.savefig(img_buffer, format='png', dpi=150)
-        plt.close()
+        fig.savefig(img_buffer, format='png', dpi=150)
         img_buffer.seek(0)
         return img_buffer
 
@@ -96,7 +96,8 @@ class MVPBlueprintGenerator:
         downloads = [d['downloads'] for d in data]
         revenue = [d['revenue'] for d in data]
 
-        fig, ax1 = plt.subplots(figsize=(8, 4))
+        fig = Figure(figsize=(8, 4))
+        ax1 = fig.add_subplot()
         fig.patch.set_facecolor('#F8FAFC')
         ax1.set_ylabel('Downloads', color='#8B5CF6', fontweight='bold')
         ax1.plot(months, downloads, color='#8B5CF6', linewidth=3, marker='o')
@@ -108,14 +109,38 @@ class MVPBlueprintGenerator:
         
         fig.tight_layout()
         img_buffer = io.BytesIO()
-        plt.savefig(img_buffer, format='png', dpi=150)
-        plt.close()
+        fig.savefig(img_buffer, format='png', dpi=150)
         img_buffer.seek(0)
         return img_buffer
 
-    def generate_report(self, data: Dict, output_path: str):
-        """Builds a complete multi-page PDF blueprint mirroring the dashboard."""
-        doc = SimpleDocTemplate(output_path, pagesize=letter)
+    def _chart(self, charts: Dict[str, bytes], kind: str, render, data_slice: List[Dict],
+               timings: Optional[Dict[str, float]] = None) -> io.BytesIO:
+        """Returns a chart PNG, drawing it only when `charts` does not already hold it."""
+        if kind not in charts:
+            started = time.perf_counter()
+            charts[kind] = render(data_slice).getvalue()
+            if timings is not None:
+                timings[f"chart_{kind}"] = time.perf_counter() - started
+        return io.BytesIO(charts[kind])
+
+    def render_bytes(self, data: Dict, charts: Optional[Dict[str, bytes]] = None,
+                     timings: Optional[Dict[str, float]] = None) -> Tuple[bytes, Dict[str, bytes]]:
+        """Renders the blueprint entirely in memory; also returns the chart PNGs it used."""
+        buffer = io.BytesIO()
+        charts = self.generate_report(data, buffer, charts, timings)
+        return buffer.getvalue(), charts
+
+    def generate_report(self, data: Dict, output: Union[str, BinaryIO],
+                        charts: Optional[Dict[str, bytes]] = None,
+                        timings: Optional[Dict[str, float]] = None) -> Dict[str, bytes]:
+        """Builds a complete multi-page PDF blueprint mirroring the dashboard.
+
+        `charts` maps 'radar', 'sentiment' and 'growth' to PNGs rendered earlier for
+        the same data; missing ones are drawn and all three are returned. If given,
+        `timings` receives the seconds spent drawing each chart and building the PDF.
+        """
+        charts = dict(charts or {})
+        doc = SimpleDocTemplate(output, pagesize=letter)
         story = []
         
         # 1. HEADER & METRIC CARDS
@@ -138,16 +163,16 @@ class MVPBlueprintGenerator:
 
         # 2. ANALYSIS CHARTS
         story.append(Paragraph("Market Gap & Sentiment Analysis", self.styles['SectionHeader']))
-        radar_img = self._create_radar_chart(data['opportunity_matrix'])
+        radar_img = self._chart(charts, 'radar', self._create_radar_chart, data['opportunity_matrix'], timings)
         story.append(Image(radar_img, width=4*inch, height=4*inch))
         
-        sentiment_img = self._create_sentiment_chart(data['sentiment_chart_data'])
+        sentiment_img = self._chart(charts, 'sentiment', self._create_sentiment_chart, data['sentiment_chart_data'], timings)
         story.append(Image(sentiment_img, width=4*inch, height=2.5*inch))
         story.append(PageBreak())
 
         # 3. GROWTH & ROADMAP
         story.append(Paragraph("Growth Forecast & Strategy", self.styles['SectionHeader']))
-        growth_img = self._create_growth_chart(data['growth_trend'])
+        growth_img = self._chart(charts, 'growth', self._create_growth_chart, data['growth_trend'], timings)
         story.append(Image(growth_img, width=6*inch, height=3*inch))
         
         story.append(Paragraph("Strategic Roadmap", self.styles['Heading3']))
@@ -178,4 +203,8 @@ class MVPBlueprintGenerator:
         story.append(Paragraph("ASO Keywords", self.styles['Heading3']))
         story.append(Paragraph(", ".join(data.get('aso_keywords', [])), self.styles['Normal']))
 
-        doc.build(story)
\ No newline at end of file
+        started = time.perf_counter()
+        doc.build(story)
+        if timings is not None:
+            timings['pdf_build'] = time.perf_counter() - started
+        return charts
\ No newline at end of file
@@ -0,0 +1,152 @@
+import asyncio
+import multiprocessing
+import os
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, List, Optional, Tuple
+
+from cache_codecs import content_hash
+from metrics import RENDER_SECONDS, record_timing
+
+PDF_WORKERS = int(os.getenv("PDF_WORKERS", "2"))
+PDF_MAX_CONCURRENT = int(os.getenv("PDF_MAX_CONCURRENT", str(PDF_WORKERS)))
+PDF_QUEUE_LIMIT = int(os.getenv("PDF_QUEUE_LIMIT", "16"))  # Requests allowed to wait for a render slot
+# Not fork: the API process has thread pools running, and a forked child can inherit a held lock.
+# forkserver is POSIX-only; Windows (and anything else without it) uses spawn
+_SAFE_START_METHOD = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+PDF_START_METHOD = os.getenv("PDF_START_METHOD", _SAFE_START_METHOD)
+
+# Each chart is cached by the hash of only the payload slice it draws
+CHART_SOURCES = {'radar': 'opportunity_matrix', 'sentiment': 'sentiment_chart_data', 'growth': 'growth_trend'}
+
+# --- WORKER PROCESS STATE ---
+_generator = None
+
+def _init_worker():
+    """Runs once per worker: imports matplotlib/ReportLab and builds the styles up front."""
+    global _generator
+    from pdf_generator import MVPBlueprintGenerator
+    _generator = MVPBlueprintGenerator()
+
+def _render(data: Dict, charts: Dict[str, bytes]) -> Tuple[bytes, Dict[str, bytes], Dict[str, float]]:
+    # Metrics live in the API process, so timings travel back with the result
+    timings = {}
+    pdf_bytes, rendered = _generator.render_bytes(data, charts, timings)
+    return pdf_bytes, rendered, timings
+
+def _ping() -> bool:
+    return _generator is not None
+
+class RenderQueueFull(Exception):
+    """Raised when every render slot is busy and the wait queue is at its limit."""
+
+class PDFRenderService:
+    """Renders blueprints on a pool of warm worker processes, off the API event loop.
+
+    At most `max_concurrent` renders run at once; up to `max_queue` more wait their
+    turn, and anything beyond that is rejected with RenderQueueFull.
+
+    With a BlobCache, finished PDFs are cached by the hash of the whole payload and
+    chart PNGs by the hash of their own data slice, so a repeat download costs no
+    render and a payload that only changed its text reuses all three charts.
+    """
+    def __init__(self, workers: int = PDF_WORKERS, max_concurrent: int = PDF_MAX_CONCURRENT,
+                 max_queue: int = PDF_QUEUE_LIMIT, blobs=None):
+        self.blobs = blobs
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.workers = workers
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._warmup: List[Future] = []
+        self.pending = 0
+
+    def start(self, warm: bool = True):
+        """Creates the pool; with `warm`, each worker spawns and imports its libraries now."""
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                             mp_context=multiprocessing.get_context(PDF_START_METHOD))
+            self._warmup = [self._pool.submit(_ping) for _ in range(self.workers)] if warm else []
+
+    @property
+    def is_warm(self) -> bool:
+        """True once every worker has imported matplotlib and reportlab."""
+        return self._pool is not None and bool(self._warmup) and \
+            all(f.done() and not f.exception() for f in self._warmup)
+
+    async def warm(self) -> bool:
+        """Starts the pool and waits until each worker answered its warm-up ping."""
+        self.start()
+        if not self._warmup:
+            return False
+        await asyncio.gather(*(asyncio.wrap_future(f) for f in self._warmup))
+        return self.is_warm
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    async def render(self, data: Dict) -> bytes:
+        if self.blobs is None:
+            pdf_bytes, _ = await self._render(data, {})
+            return pdf_bytes
+
+        pdf_key = f"genregenius:pdf:{content_hash(data)}"
+        cached = await self.blobs.get(pdf_key)
+        if cached is not None:
+            return cached
+        # Identical payloads requested together (repeat clicks) share one render
+        if pdf_key in self._inflight:
+            return await asyncio.shield(self._inflight[pdf_key])
+        future = asyncio.ensure_future(self._render_and_store(pdf_key, data))
+        self._inflight[pdf_key] = future
+        future.add_done_callback(lambda _: self._inflight.pop(pdf_key, None))
+        return await asyncio.shield(future)
+
+    async def _render_and_store(self, pdf_key: str, data: Dict) -> bytes:
+        chart_keys = {kind: f"genregenius:chart:{kind}:{content_hash(data.get(source))}"
+                      for kind, source in CHART_SOURCES.items()}
+        charts = {}
+        for kind, key in chart_keys.items():
+            png = await self.blobs.get(key)
+            if png is not None:
+                charts[kind] = png
+
+        pdf_bytes, rendered = await self._render(data, charts)
+        for kind, png in rendered.items():
+            if kind not in charts:
+                await self.blobs.set(chart_keys[kind], png)
+        await self.blobs.set(pdf_key, pdf_bytes)
+        return pdf_bytes
+
+    async def _render(self, data: Dict, charts: Dict[str, bytes]) -> Tuple[bytes, Dict[str, bytes]]:
+        """Runs one render on the pool, reusing `charts`; returns the PDF and all chart PNGs."""
+        if self.pending >= self.max_concurrent + self.max_queue:
+            raise RenderQueueFull(f"{self.pending} PDF renders already in progress or queued")
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_concurrent)
+        self.start()
+
+        self.pending += 1
+        try:
+            async with self._slots:
+                loop = asyncio.get_running_loop()
+                started = time.perf_counter()
+                try:
+                    pdf_bytes, rendered, timings = await loop.run_in_executor(self._pool, _render, data, charts)
+                except BrokenProcessPool:
+                    # A worker died (e.g. OOM); rebuild the pool once and retry. The new warm-up
+                    # pings queue ahead of the retry, so readiness recovers with the pool
+                    self.shutdown()
+                    self.start()
+                    pdf_bytes, rendered, timings = await loop.run_in_executor(self._pool, _render, data, charts)
+                timings['pdf_total'] = time.perf_counter() - started
+        finally:
+            self.pending -= 1
+        for part, seconds in timings.items():
+            RENDER_SECONDS.observe(seconds, part=part)
+            record_timing(part, seconds)
+        return pdf_bytes, rendered
@@ -1,35 +1,514 @@
-import redis
+import asyncio
+import gzip
 import json
-from typing import Optional, Dict
+import os
+import time
+import uuid
+from collections import Counter, OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+import redis.asyncio as aioredis
+from redis.exceptions import ConnectionError as RedisConnectionError, RedisError, TimeoutError as RedisTimeoutError
+
+from cache_codecs import PayloadCodec, COMPRESS_THRESHOLD, content_hash
+from metrics import CACHE_PAYLOAD_BYTES, CACHE_REQUESTS, REDIS_SECONDS, record_timing
+
+REDIS_HOST = os.getenv("REDIS_HOST", "localhost")
+REDIS_PORT = int(os.getenv("REDIS_PORT", "6379"))
+REDIS_MAX_CONNECTIONS = int(os.getenv("REDIS_MAX_CONNECTIONS", "32"))
+REDIS_TIMEOUT = float(os.getenv("REDIS_TIMEOUT", "0.5"))
+L1_MAX_ENTRIES = int(os.getenv("CACHE_L1_MAX_ENTRIES", "256"))
+L1_TTL = int(os.getenv("CACHE_L1_TTL", "60"))
+CACHE_SERIALIZER = os.getenv("CACHE_SERIALIZER", "msgpack")
+CACHE_COMPRESS_THRESHOLD = int(os.getenv("CACHE_COMPRESS_THRESHOLD", str(COMPRESS_THRESHOLD)))
+
+ANALYSIS_TTL = 86400        # Entries are fresh for a day...
+STALE_TTL = 6 * 3600        # ...and may be served stale for a while after that
+RECONNECT_BACKOFF_MAX = 30  # Seconds between Redis retries once it starts failing
+REDIS_CONNECT_ATTEMPTS = int(os.getenv("REDIS_CONNECT_ATTEMPTS", "5"))  # Pings at startup before giving up
+WIRE_GZIP_LEVEL = int(os.getenv("CACHE_WIRE_GZIP_LEVEL", "6"))  # Paid once per write, not per hit
+
+# Raw scrape artifacts, shared across genres
+SEARCH_TTL = int(os.getenv("ARTIFACT_SEARCH_TTL", "3600"))
+DETAILS_TTL = int(os.getenv("ARTIFACT_DETAILS_TTL", str(6 * 3600)))
+# Review batches are kept well past their freshness window so the high-water mark survives
+REVIEWS_TTL = int(os.getenv("ARTIFACT_REVIEWS_TTL", str(7 * 86400)))
+ARTIFACT_L1_MAX_ENTRIES = int(os.getenv("ARTIFACT_L1_MAX_ENTRIES", "2048"))
+
+# Content-addressed rendered artifacts (chart PNGs, PDFs)
+BLOB_TTL = int(os.getenv("BLOB_CACHE_TTL", str(7 * 86400)))
+BLOB_L1_MAX_BYTES = int(os.getenv("BLOB_CACHE_L1_MAX_BYTES", str(64 * 1024 * 1024)))
+BLOB_MAX_ITEM_BYTES = int(os.getenv("BLOB_CACHE_MAX_ITEM_BYTES", str(8 * 1024 * 1024)))
+
+# Compare-and-delete so a worker never releases a lock another worker now holds
+_RELEASE_LOCK_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+POPULARITY_KEY = "genregenius:popularity"
+POPULARITY_NAMES_KEY = "genregenius:popularity:names"
+# Genre strings come from clients; only the most requested ones are remembered
+POPULARITY_MAX_GENRES = int(os.getenv("CACHE_POPULARITY_MAX_GENRES", "1000"))
+
+_UNAVAILABLE = object()
+
+def normalize_genre(genre: str) -> str:
+    return genre.strip().lower()
+
+def analysis_id(genre: str, lang: str = 'en', country: str = 'us') -> str:
+    """Cache identity of one analysis; the default region keeps the original genre-only key."""
+    if (lang, country) == ('en', 'us'):
+        return normalize_genre(genre)
+    return f"{normalize_genre(genre)}:{lang.lower()}-{country.lower()}"
+
+class LRUCache:
+    """In-process tier bounded by entry count and per-entry TTL.
+
+    With `max_bytes` set, values must be bytes and the tier is also bounded by their total size.
+    """
+    def __init__(self, max_entries: int = L1_MAX_ENTRIES, ttl: float = L1_TTL, max_bytes: Optional[int] = None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self.stats = Counter(hits=0, misses=0, evictions=0, expirations=0)
+
+    def _size(self, value: Any) -> int:
+        return len(value) if self.max_bytes is not None else 0
+
+    def _pop(self, key: str):
+        value, _ = self._entries.pop(key)
+        self.bytes -= self._size(value)
+
+    def get(self, key: str) -> Any:
+        item = self._entries.get(key)
+        if item is None:
+            self.stats['misses'] += 1
+            return None
+        value, expires_at = item
+        if expires_at <= time.monotonic():
+            self._pop(key)
+            self.stats['expirations'] += 1
+            self.stats['misses'] += 1
+            return None
+        self._entries.move_to_end(key)
+        self.stats['hits'] += 1
+        return value
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        if key in self._entries:
+            self._pop(key)
+        self._entries[key] = (value, time.monotonic() + (self.ttl if ttl is None else ttl))
+        self.bytes += self._size(value)
+        while len(self._entries) > self.max_entries or (self.max_bytes is not None and self.bytes > self.max_bytes):
+            self._pop(next(iter(self._entries)))
+            self.stats['evictions'] += 1
+
+    def delete(self, key: str):
+        if key in self._entries:
+            self._pop(key)
+
+    def clear(self):
+        self._entries.clear()
+        self.bytes = 0
+
+    def snapshot(self) -> Dict:
+        snapshot = {**self.stats, 'size': len(self._entries), 'max_entries': self.max_entries}
+        if self.max_bytes is not None:
+            snapshot.update(bytes=self.bytes, max_bytes=self.max_bytes)
+        return snapshot
 
 class MarketAnalysisCache:
-    def __init__(self, host='localhost', port=6379):
+    """Two-tier cache: a bounded in-process LRU in front of a pooled asyncio Redis client.
+
+    Redis failures never surface to callers. The client backs off and retries on a later
+    call, and while it is down the L1 tier keeps serving (and accepting) entries.
+    """
+    def __init__(self, host=REDIS_HOST, port=REDIS_PORT, ttl: int = ANALYSIS_TTL, stale_ttl: int = STALE_TTL,
+                 l1_max_entries: int = L1_MAX_ENTRIES, l1_ttl: int = L1_TTL,
+                 codec: Optional[PayloadCodec] = None):
+        self.ttl = ttl
+        self.codec = codec or PayloadCodec(CACHE_SERIALIZER, CACHE_COMPRESS_THRESHOLD)
+        self.stale_ttl = stale_ttl
+        self.l1 = LRUCache(max_entries=l1_max_entries, ttl=l1_ttl)
+        self.pool = aioredis.ConnectionPool(
+            host=host, port=port, max_connections=REDIS_MAX_CONNECTIONS,
+            socket_timeout=REDIS_TIMEOUT, socket_connect_timeout=REDIS_TIMEOUT,
+            health_check_interval=30
+        )
+        self.redis_client = aioredis.Redis(connection_pool=self.pool)
+        self.redis_stats = Counter(hits=0, misses=0, errors=0, reconnects=0)
+        self.local_locks: Dict[str, tuple] = {}
+        self._failures = 0
+        self._retry_at = 0.0
+        self.connected = False  # Last Redis call succeeded
+
+    @property
+    def enabled(self) -> bool:
+        """True unless Redis recently failed and is inside its back-off window."""
+        return time.monotonic() >= self._retry_at
+
+    async def connect(self, attempts: int = REDIS_CONNECT_ATTEMPTS) -> bool:
+        """Pings Redis until it answers, waiting out the usual back-off between attempts.
+
+        Never raises: if Redis is still down after `attempts` pings the cache keeps
+        running on L1 and later calls retry on their own.
+        """
+        for attempt in range(attempts):
+            if attempt:
+                await asyncio.sleep(max(0.0, self._retry_at - time.monotonic()))
+            if await self._redis_call('ping') is not _UNAVAILABLE:
+                print("✅ Redis connected")
+                return True
+        print(f"⚠️ Redis not reachable after {attempts} attempts; serving from L1 until it is")
+        return False
+
+    async def _redis_call(self, method: str, *args, **kwargs):
+        if not self.enabled:
+            return _UNAVAILABLE
+        if method in ('set', 'setex') and isinstance(args[-1], bytes):
+            # Keys are 'genregenius:<kind>:...'; the kind labels the size histogram
+            CACHE_PAYLOAD_BYTES.observe(len(args[-1]), kind=args[0].split(':')[1])
+        started = time.perf_counter()
         try:
-            self.redis_client = redis.Redis(host=host, port=port, decode_responses=True)
-            self.redis_client.ping()
-            self.enabled = True
-        except:
-            self.enabled = False
-            self.local_cache = {}
-
-    def get_analysis(self, genre: str) -> Optional[Dict]:
+            result = await getattr(self.redis_client, method)(*args, **kwargs)
+        except (RedisError, OSError) as e:
+            self.redis_stats['errors'] += 1
+            if not isinstance(e, (RedisConnectionError, RedisTimeoutError, OSError)):
+                print(f"⚠️ Redis command '{method}' failed: {e}")
+                return _UNAVAILABLE
+            self.connected = False
+            if self.enabled:
+                # Concurrent calls that fail together count as one failed attempt
+                self._failures += 1
+                backoff = min(RECONNECT_BACKOFF_MAX, 2 ** (self._failures - 1))
+                self._retry_at = time.monotonic() + backoff
+                print(f"⚠️ Redis unavailable ({e}); retrying in {backoff}s")
+            return _UNAVAILABLE
+        finally:
+            elapsed = time.perf_counter() - started
+            REDIS_SECONDS.observe(elapsed, command=method)
+            record_timing("redis", elapsed)
+        self.connected = True
+        if self._failures:
+            self._failures = 0
+            self.redis_stats['reconnects'] += 1
+        return result
+
+    def _key(self, genre: str) -> str:
         # CRITICAL: Key includes genre to prevent data mixing
-        key = f"genregenius:analysis:{genre.lower()}"
-        if self.enabled:
-            data = self.redis_client.get(key)
-            return json.loads(data) if data else None
-        return self.local_cache.get(key)
-
-    def cache_analysis(self, genre: str, data: Dict):
-        key = f"genregenius:analysis:{genre.lower()}"
-        if self.enabled:
-            self.redis_client.setex(key, 86400, json.dumps(data))
+        return f"genregenius:analysis:{normalize_genre(genre)}"
+
+    def _lock_key(self, genre: str) -> str:
+        return f"genregenius:lock:{normalize_genre(genre)}"
+
+    def _wire_keys(self, genre: str) -> Tuple[str, str]:
+        normalized = normalize_genre(genre)
+        # v2: bodies carry cached_at/stale_at; older bodies are left to expire unread
+        return f"genregenius:analysis_meta:{normalized}", f"genregenius:analysis_wire:v2:{normalized}"
+
+    def cache_fields(self, cached_at: Optional[float]) -> Dict:
+        """Fields every cache hit carries, on every path. Both timestamps are fixed for the
+        entry's life, so a pre-rendered body stays valid; age and staleness follow from them."""
+        return {'is_cached': True, 'cached_at': cached_at,
+                'stale_at': None if cached_at is None else cached_at + self.ttl}
+
+    def render_wire_body(self, data: Dict, cached_at: float) -> bytes:
+        """The JSON body served for cache hits, gzipped once when the entry is written."""
+        body = json.dumps({**data, **self.cache_fields(cached_at)}, ensure_ascii=False, separators=(',', ':'),
+                          default=str)
+        return gzip.compress(body.encode('utf-8'), compresslevel=WIRE_GZIP_LEVEL)
+
+    async def get_entry(self, genre: str, bypass_l1: bool = False) -> Optional[Dict]:
+        """Returns the cached payload with its age, including entries past their fresh TTL."""
+        key = self._key(genre)
+        stored = None if bypass_l1 else self.l1.get(key)
+        if stored is None:
+            raw = await self._redis_call('get', key)
+            if raw is _UNAVAILABLE or raw is None:
+                if raw is None:
+                    self.redis_stats['misses'] += 1
+                CACHE_REQUESTS.inc(cache='analysis', result='miss')
+                return None
+            self.redis_stats['hits'] += 1
+            CACHE_REQUESTS.inc(cache='analysis', result='redis_hit')
+            stored = self.codec.decode(raw)
+            self.l1.set(key, stored)
+        else:
+            CACHE_REQUESTS.inc(cache='analysis', result='l1_hit')
+
+        if 'cached_at' not in stored:
+            # Entries written before envelopes existed are plain payloads
+            return {'data': stored, 'cached_at': None, 'age': None, 'is_stale': False}
+
+        age = time.time() - stored['cached_at']
+        if age > self.ttl + self.stale_ttl:
+            return None
+        return {'data': stored['data'], 'cached_at': stored['cached_at'], 'age': age, 'is_stale': age > self.ttl}
+
+    async def get_analysis(self, genre: str) -> Optional[Dict]:
+        entry = await self.get_entry(genre)
+        if entry is None or entry['is_stale']:
+            return None
+        return entry['data']
+
+    async def cache_analysis(self, genre: str, data: Dict):
+        key = self._key(genre)
+        stored = {'data': data, 'cached_at': time.time()}
+        lifetime = self.ttl + self.stale_ttl
+        written = await self._redis_call('setex', key, lifetime, self.codec.encode(stored))
+        # With Redis down the L1 tier is the only copy, so keep it for the entry's full life
+        l1_ttl = None if written is not _UNAVAILABLE else lifetime
+        self.l1.set(key, stored, ttl=l1_ttl)
+
+        # Version tag and ready-to-send body, so hits skip decoding and re-serializing the payload
+        meta_key, wire_key = self._wire_keys(genre)
+        meta = {'etag': f'W/"{content_hash(data)[:32]}"', 'cached_at': stored['cached_at']}
+        wire = self.render_wire_body(data, stored['cached_at'])
+        # Body before meta: a meta hit then (almost always) finds its body
+        await self._redis_call('setex', wire_key, lifetime, wire)
+        await self._redis_call('setex', meta_key, lifetime, self.codec.encode(meta))
+        self.l1.set(wire_key, wire, ttl=l1_ttl)
+        self.l1.set(meta_key, meta, ttl=l1_ttl)
+
+    async def get_wire_meta(self, genre: str) -> Optional[Dict]:
+        """ETag and age of the cached analysis without touching its payload; None if absent or expired."""
+        meta_key, _ = self._wire_keys(genre)
+        meta = self.l1.get(meta_key)
+        if meta is None:
+            raw = await self._redis_call('get', meta_key)
+            if raw is _UNAVAILABLE or raw is None:
+                return None
+            meta = self.codec.decode(raw)
+            self.l1.set(meta_key, meta)
+        age = time.time() - meta['cached_at']
+        if age > self.ttl + self.stale_ttl:
+            return None
+        return {**meta, 'age': age, 'is_stale': age > self.ttl}
+
+    async def get_wire_body(self, genre: str) -> Optional[bytes]:
+        """Gzipped JSON body written alongside the entry by cache_analysis."""
+        _, wire_key = self._wire_keys(genre)
+        body = self.l1.get(wire_key)
+        if body is None:
+            body = await self.get_bytes(wire_key)
+            if body is not None:
+                self.l1.set(wire_key, body)
+        return body
+
+    async def acquire_lock(self, genre: str, ttl: int) -> Optional[str]:
+        """Takes the per-genre analysis lock shared by all workers; returns a token or None."""
+        token = uuid.uuid4().hex
+        key = self._lock_key(genre)
+        acquired = await self._redis_call('set', key, token, nx=True, ex=ttl)
+        if acquired is not _UNAVAILABLE:
+            return token if acquired else None
+        now = time.time()
+        holder = self.local_locks.get(key)
+        if holder and holder[1] > now:
+            return None
+        self.local_locks[key] = (token, now + ttl)
+        return token
+
+    async def release_lock(self, genre: str, token: str):
+        key = self._lock_key(genre)
+        if self.local_locks.get(key, (None,))[0] == token:
+            del self.local_locks[key]
         else:
-            self.local_cache[key] = data
+            await self._redis_call('eval', _RELEASE_LOCK_SCRIPT, 1, key, token)
+
+    async def is_locked(self, genre: str) -> bool:
+        key = self._lock_key(genre)
+        holder = self.local_locks.get(key)
+        if holder and holder[1] > time.time():
+            return True
+        exists = await self._redis_call('exists', key)
+        return bool(exists) if exists is not _UNAVAILABLE else False
+
+    async def get_value(self, key: str) -> Any:
+        """Reads and decodes an arbitrary Redis key; None on miss or while Redis is down."""
+        raw = await self._redis_call('get', key)
+        if raw is _UNAVAILABLE or raw is None:
+            return None
+        return self.codec.decode(raw)
+
+    async def set_value(self, key: str, value: Any, ttl: int) -> bool:
+        written = await self._redis_call('setex', key, ttl, self.codec.encode(value))
+        return written is not _UNAVAILABLE
+
+    async def get_bytes(self, key: str) -> Optional[bytes]:
+        """Raw bytes without the codec, for blobs that are already compact (PNG, PDF)."""
+        raw = await self._redis_call('get', key)
+        return None if raw is _UNAVAILABLE else raw
+
+    async def set_bytes(self, key: str, value: bytes, ttl: int) -> bool:
+        written = await self._redis_call('setex', key, ttl, value)
+        return written is not _UNAVAILABLE
+
+    async def set_if_absent(self, key: str, value: Any, ttl: int) -> bool:
+        """SET NX across workers; False if the key exists or Redis is down."""
+        written = await self._redis_call('set', key, self.codec.encode(value), nx=True, ex=ttl)
+        return written is not _UNAVAILABLE and bool(written)
+
+    async def add_popularity(self, counts: Dict[str, int], max_genres: int = POPULARITY_MAX_GENRES) -> bool:
+        """Adds request counts to the per-genre ranking shared by all workers; False if Redis is down.
+
+        The ranking is trimmed to its `max_genres` most requested genres after each update.
+        """
+        for genre, count in counts.items():
+            key = normalize_genre(genre)
+            if await self._redis_call('zincrby', POPULARITY_KEY, count, key) is _UNAVAILABLE:
+                return False
+            # Remember a display spelling: analyses are case-sensitive about known genres
+            await self._redis_call('hset', POPULARITY_NAMES_KEY, key, genre.strip())
+        dropped = await self._redis_call('zrange', POPULARITY_KEY, 0, -(max_genres + 1))
+        if dropped is not _UNAVAILABLE and dropped:
+            await self._redis_call('zrem', POPULARITY_KEY, *dropped)
+            await self._redis_call('hdel', POPULARITY_NAMES_KEY, *dropped)
+        return True
+
+    async def top_popularity(self, n: int) -> Optional[List[Tuple[str, float]]]:
+        """Most requested genres as (display name, count), or None while Redis is down."""
+        ranked = await self._redis_call('zrevrange', POPULARITY_KEY, 0, n - 1, withscores=True)
+        if ranked is _UNAVAILABLE:
+            return None
+        keys = [member.decode() if isinstance(member, bytes) else member for member, _ in ranked]
+        names = await self._redis_call('hmget', POPULARITY_NAMES_KEY, keys) if keys else []
+        if names is _UNAVAILABLE:
+            names = [None] * len(keys)
+        return [((name.decode() if isinstance(name, bytes) else name) or key, score)
+                for key, name, (_, score) in zip(keys, names, ranked)]
+
+    async def clear(self):
+        self.l1.clear()
+        self.local_locks.clear()
+        await self._redis_call('flushdb')
+
+    async def stats(self) -> Dict:
+        redis_tier = {**self.redis_stats, 'available': self.enabled, 'evictions': None}
+        info = await self._redis_call('info', 'stats')
+        if info is not _UNAVAILABLE:
+            redis_tier['evictions'] = info.get('evicted_keys', 0)
+        return {'l1': self.l1.snapshot(), 'redis': redis_tier}
+
+    async def close(self):
+        await self.redis_client.aclose()
+
+class ScrapeArtifactCache:
+    """Raw scrape results shared by every genre analysis, on the same tiers as MarketAnalysisCache.
 
-def add_cache_endpoints(app, cache: MarketAnalysisCache):
+    App details and review batches are keyed by app_id, search hits by
+    (genre, lang, country, n_hits), each with its own TTL.
+    """
+    KINDS = ('search', 'details', 'reviews')
+
+    def __init__(self, backend: MarketAnalysisCache, search_ttl: int = SEARCH_TTL,
+                 details_ttl: int = DETAILS_TTL, reviews_ttl: int = REVIEWS_TTL,
+                 l1_max_entries: int = ARTIFACT_L1_MAX_ENTRIES):
+        self.backend = backend
+        self.ttls = {'search': search_ttl, 'details': details_ttl, 'reviews': reviews_ttl}
+        self.l1 = LRUCache(max_entries=l1_max_entries, ttl=L1_TTL)
+        self.stats = {kind: Counter(hits=0, misses=0) for kind in self.KINDS}
+
+    async def _get(self, kind: str, key: str) -> Any:
+        value = self.l1.get(key)
+        result = 'l1_hit'
+        if value is None:
+            value = await self.backend.get_value(key)
+            result = 'redis_hit'
+            if value is not None:
+                self.l1.set(key, value, ttl=min(L1_TTL, self.ttls[kind]))
+        self.stats[kind]['hits' if value is not None else 'misses'] += 1
+        CACHE_REQUESTS.inc(cache=kind, result=result if value is not None else 'miss')
+        return value
+
+    async def _set(self, kind: str, key: str, value: Any):
+        ttl = self.ttls[kind]
+        written = await self.backend.set_value(key, value, ttl)
+        self.l1.set(key, value, ttl=min(L1_TTL, ttl) if written else ttl)
+
+    async def get_search(self, genre: str, lang: str, country: str, n_hits: int) -> Optional[list]:
+        return await self._get('search', f"genregenius:search:{normalize_genre(genre)}:{lang}:{country}:{n_hits}")
+
+    async def set_search(self, genre: str, lang: str, country: str, n_hits: int, app_ids: list):
+        await self._set('search', f"genregenius:search:{normalize_genre(genre)}:{lang}:{country}:{n_hits}", app_ids)
+
+    async def get_details(self, app_id: str, lang: str, country: str) -> Optional[Dict]:
+        return await self._get('details', f"genregenius:app:{app_id}:{lang}:{country}")
+
+    async def set_details(self, app_id: str, lang: str, country: str, details: Dict):
+        await self._set('details', f"genregenius:app:{app_id}:{lang}:{country}", details)
+
+    async def get_reviews(self, app_id: str, lang: str, country: str) -> Optional[Dict]:
+        return await self._get('reviews', f"genregenius:reviews:{app_id}:{lang}:{country}")
+
+    async def set_reviews(self, app_id: str, lang: str, country: str, entry: Dict):
+        await self._set('reviews', f"genregenius:reviews:{app_id}:{lang}:{country}", entry)
+
+    def report(self) -> Dict:
+        """Per-kind hit/miss counts and reuse rate (share of lookups served from cache)."""
+        report = {}
+        for kind, counter in self.stats.items():
+            lookups = counter['hits'] + counter['misses']
+            report[kind] = {**counter, 'reuse_rate': round(counter['hits'] / lookups, 3) if lookups else None}
+        report['l1'] = self.l1.snapshot()
+        return report
+
+class BlobCache:
+    """Content-addressed bytes (chart PNGs, finished PDFs): a size-bounded L1 over Redis.
+
+    Keys are expected to embed a hash of the inputs, so entries never need invalidating;
+    they only age out by TTL in Redis and by total size in process.
+    """
+    def __init__(self, backend: MarketAnalysisCache, ttl: int = BLOB_TTL,
+                 l1_max_bytes: int = BLOB_L1_MAX_BYTES, max_item_bytes: int = BLOB_MAX_ITEM_BYTES):
+        self.backend = backend
+        self.ttl = ttl
+        self.max_item_bytes = max_item_bytes
+        self.l1 = LRUCache(max_entries=4096, ttl=ttl, max_bytes=l1_max_bytes)
+        self.redis_stats = Counter(hits=0, misses=0)
+
+    async def get(self, key: str) -> Optional[bytes]:
+        value = self.l1.get(key)
+        if value is not None:
+            CACHE_REQUESTS.inc(cache='blob', result='l1_hit')
+            return value
+        value = await self.backend.get_bytes(key)
+        self.redis_stats['hits' if value is not None else 'misses'] += 1
+        CACHE_REQUESTS.inc(cache='blob', result='redis_hit' if value is not None else 'miss')
+        if value is not None:
+            self.l1.set(key, value)
+        return value
+
+    async def set(self, key: str, value: bytes):
+        if len(value) > self.max_item_bytes:
+            return
+        self.l1.set(key, value)
+        await self.backend.set_bytes(key, value, self.ttl)
+
+    def snapshot(self) -> Dict:
+        return {'l1': self.l1.snapshot(), 'redis': dict(self.redis_stats)}
+
+def add_cache_endpoints(app, cache: MarketAnalysisCache, artifacts: Optional[ScrapeArtifactCache] = None,
+                        blobs: Optional[BlobCache] = None):
     @app.delete("/api/cache/clear-all")
     async def clear_cache():
-        if cache.enabled: cache.redis_client.flushdb()
-        else: cache.local_cache = {}
-        return {"message": "Cache Cleared"}
\ No newline at end of file
+        await cache.clear()
+        if artifacts: artifacts.l1.clear()
+        if blobs: blobs.l1.clear()
+        return {"message": "Cache Cleared"}
+
+    @app.get("/api/cache/stats")
+    async def cache_stats():
+        stats = await cache.stats()
+        if blobs: stats['blobs'] = blobs.snapshot()
+        return stats
+
+    @app.get("/api/cache/artifacts")
+    async def artifact_report():
+        """Reuse of cached search hits, app details and review batches across genre analyses."""
+        return artifacts.report() if artifacts else {}
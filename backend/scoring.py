@@ -0,0 +1,149 @@
+import os
+import random
+from datetime import date
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+FORECAST_MONTHS = int(os.getenv("FORECAST_MONTHS", "4"))
+MAX_FORECAST_MONTHS = 36
+REVENUE_PER_DOWNLOAD = 0.05  # Assume $0.05 revenue per download for the MVP
+FORECAST_TOP_APPS = 10       # Forecast base: installs of the top 10 apps
+DEFAULT_INSTALLS = 5000      # Forecast base for an app whose installs are unknown
+DEFAULT_RATING = 4.0         # Genres without a single rated app
+
+FEATURE_SETS = {
+    "Productivity": ["AI Task Prep", "Offline Sync", "Collab Tools", "Privacy Shield", "Automation"],
+    "Fitness": ["Heart Tracking", "Meal Planner", "Social Community", "Wearable Sync", "AI Coach"],
+    "Finance": ["Crypto Sync", "Tax Export", "Budgeting Bot", "Fraud Alert", "Goal Tracker"]
+}
+DEFAULT_FEATURES = ["AI Logic", "Offline Mode", "Customization", "Analytics", "Security"]
+
+def features_for(genre: str) -> List[str]:
+    return FEATURE_SETS.get(genre, DEFAULT_FEATURES)
+
+# --- STACKING ---
+def stack_app_metrics(app_lists: Sequence[List[Dict]]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Packs per-genre app lists into (ratings, installs, present) arrays of shape (genres, apps).
+
+    Unknown ratings and installs are NaN; `present` marks real apps versus padding.
+    """
+    width = max((len(apps) for apps in app_lists), default=0)
+    ratings = np.full((len(app_lists), width), np.nan)
+    installs = np.full((len(app_lists), width), np.nan)
+    present = np.zeros((len(app_lists), width), dtype=bool)
+    for g, apps in enumerate(app_lists):
+        for a, app in enumerate(apps):
+            present[g, a] = True
+            if app.get('rating') is not None:
+                ratings[g, a] = app['rating']
+            if app.get('installs_numeric') is not None:
+                installs[g, a] = app['installs_numeric']
+    return ratings, installs, present
+
+# --- SCORING ---
+def score_markets(ratings: np.ndarray, installs: np.ndarray) -> Dict[str, np.ndarray]:
+    """Average rating, total installs, saturation (0-100) and opportunity (10-95) per genre."""
+    rated = ~np.isnan(ratings)
+    n_rated = rated.sum(axis=1)
+    avg_rating = np.where(n_rated > 0, np.where(rated, ratings, 0).sum(axis=1) / np.maximum(n_rated, 1),
+                          DEFAULT_RATING)
+    total_installs = np.nansum(installs, axis=1)
+    saturation = np.minimum(np.trunc(total_installs / 1_000_000), 100)
+    opportunity = np.clip(np.trunc(100 - saturation * 0.5 + (5 - avg_rating) * 10), 10, 95)
+    return {
+        'avg_rating': avg_rating,
+        'total_installs': total_installs,
+        'saturation': saturation.astype(int),
+        'opportunity': opportunity.astype(int)
+    }
+
+def gap_noise(genres: Sequence[str], n_features: int = 5) -> np.ndarray:
+    """Per-feature market jitter, seeded by genre so every run shows the same chart."""
+    noise = np.empty((len(genres), n_features), dtype=int)
+    for g, genre in enumerate(genres):
+        rng = random.Random(genre)
+        noise[g] = [rng.randint(-10, 10) for _ in range(n_features)]
+    return noise
+
+def gap_matrix(avg_rating: np.ndarray, pain: np.ndarray, noise: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Market coverage (20-85) and opportunity (30-95) per genre and feature.
+
+    `pain` is each genre's (Bugs/Crashes + Missing Features) // 2 complaint count.
+    """
+    base_coverage = np.trunc(avg_rating / 5 * 100)
+    market = np.clip(base_coverage[:, None] + noise, 20, 85)
+    opportunity = np.clip(100 - base_coverage + pain, 30, 95)
+    return market.astype(int), np.broadcast_to(opportunity[:, None], noise.shape).astype(int)
+
+# --- FORECASTING ---
+def forecast_months(n: int, start: Optional[date] = None) -> List[date]:
+    """First day of each of the `n` calendar months after `start` (default: today)."""
+    start = start or date.today()
+    months = []
+    for i in range(1, n + 1):
+        year, month = divmod(start.month - 1 + i, 12)
+        months.append(date(start.year + year, month + 1, 1))
+    return months
+
+def forecast(installs: np.ndarray, present: np.ndarray, opportunity: np.ndarray,
+             months: int = FORECAST_MONTHS) -> Tuple[np.ndarray, np.ndarray]:
+    """Monthly downloads and revenue per genre, shape (genres, months).
+
+    Month i grows the top apps' combined monthly installs by (1 + opportunity/100) ** i.
+    """
+    top = installs[:, :FORECAST_TOP_APPS]
+    base = np.where(present[:, :FORECAST_TOP_APPS], np.nan_to_num(top, nan=DEFAULT_INSTALLS), 0).sum(axis=1)
+    growth = (1 + opportunity / 100)[:, None] ** np.arange(months)
+    downloads = np.trunc(base[:, None] / 24 * growth)
+    revenue = np.trunc(downloads * REVENUE_PER_DOWNLOAD)
+    return downloads.astype(np.int64), revenue.astype(np.int64)
+
+def trend_rows(downloads: np.ndarray, revenue: np.ndarray, months: List[date]) -> List[Dict]:
+    """One genre's forecast in the dashboard's growth_trend shape."""
+    return [{"month": m.strftime("%b"), "date": m.strftime("%Y-%m"), "downloads": int(d), "revenue": int(r)}
+            for m, d, r in zip(months, downloads, revenue)]
+
+# --- BATCHED PASS ---
+def score_genres(app_lists: Sequence[List[Dict]], pains: Optional[Sequence[int]] = None,
+                 genres: Optional[Sequence[str]] = None, months: int = FORECAST_MONTHS) -> Dict[str, np.ndarray]:
+    """Scores many genres in one pass: market metrics, forecasts and, given `genres`, gap matrices."""
+    ratings, installs, present = stack_app_metrics(app_lists)
+    scores = score_markets(ratings, installs)
+    scores['apps'] = present.sum(axis=1)
+    scores['downloads'], scores['revenue'] = forecast(installs, present, scores['opportunity'], months)
+    if genres is not None:
+        pain = np.asarray(pains if pains is not None else [0] * len(genres))
+        scores['gap_market'], scores['gap_opportunity'] = gap_matrix(scores['avg_rating'], pain, gap_noise(genres))
+    return scores
+
+# --- CROSS-GENRE RANKING ---
+# Sort key -> True when higher ranks first
+LEADERBOARD_SORTS = {
+    'opportunity': True, 'saturation': False, 'avg_rating': False,
+    'total_installs': True, 'forecast_downloads': True, 'forecast_revenue': True
+}
+
+def leaderboard(genres: Sequence[str], app_lists: Sequence[List[Dict]], sort: str = 'opportunity',
+                limit: int = 50, months: int = FORECAST_MONTHS) -> List[Dict]:
+    """Ranks genres by one score, computed for all of them in a single batched pass.
+
+    Ties keep the order of `genres`. Low ratings rank first for 'avg_rating' (unhappy
+    users are the opening) and low saturation first for 'saturation'.
+    """
+    scores = score_genres(app_lists, months=months)
+    scores['forecast_downloads'] = scores['downloads'].sum(axis=1)
+    scores['forecast_revenue'] = scores['revenue'].sum(axis=1)
+    key = scores[sort]
+    order = np.argsort(-key if LEADERBOARD_SORTS[sort] else key, kind='stable')[:limit]
+    return [{
+        'rank': rank + 1,
+        'genre': genres[g],
+        'opportunity_score': int(scores['opportunity'][g]),
+        'saturation_score': int(scores['saturation'][g]),
+        'avg_rating': round(float(scores['avg_rating'][g]), 2),
+        'total_installs': int(scores['total_installs'][g]),
+        'apps': int(scores['apps'][g]),
+        'forecast_downloads': int(scores['forecast_downloads'][g]),
+        'forecast_revenue': int(scores['forecast_revenue'][g])
+    } for rank, g in enumerate(order)]
@@ -1,10 +1,30 @@
 import asyncio
+import copy
+import functools
+import os
 import re
-import random
-from typing import List, Dict, Optional
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, Callable, List, Dict, Optional, Tuple, Sequence
 from datetime import datetime
-from collections import Counter
-from google_play_scraper import search, app, reviews_all, Sort
+from collections import Counter, OrderedDict
+import google_play_scraper
+from google_play_scraper import Sort
+
+from metrics import UPSTREAM_REQUESTS, UPSTREAM_SECONDS, record_timing, span
+from sentiment import SentimentAnalyzer
+
+# --- SCRAPER TUNING ---
+MAX_CONCURRENCY = int(os.getenv("SCRAPER_MAX_CONCURRENCY", "8"))
+RATE_PER_SECOND = float(os.getenv("SCRAPER_RATE_PER_SECOND", "4"))
+RATE_BURST = int(os.getenv("SCRAPER_RATE_BURST", "8"))
+REVIEW_PAGE_SIZE = int(os.getenv("SCRAPER_REVIEW_PAGE_SIZE", "100"))
+REVIEW_MAX_PAGES = int(os.getenv("SCRAPER_REVIEW_MAX_PAGES", "5"))
+NEGATIVE_SCORES = (1, 2, 3)  # Only these feed SentimentAnalyzer
+ANALYSIS_STAGES = ('search', 'details', 'reviews', 'sentiment', 'scoring')
+
+ProgressCallback = Optional[Callable[[str], None]]
+REVIEW_FRESH_SECONDS = int(os.getenv("SCRAPER_REVIEW_FRESH_SECONDS", "1800"))
 
 # --- HELPER: CLEAN NUMBERS ---
 def parse_installs(installs_str: str) -> int:
@@ -16,112 +36,356 @@ def parse_installs(installs_str: str) -> int:
     except ValueError:
         return 0
 
+# --- HELPER: SHARED RATE LIMITING ---
+class TokenBucket:
+    """Async token bucket shared by every upstream Play Store call."""
+    def __init__(self, rate: float = RATE_PER_SECOND, burst: int = RATE_BURST):
+        self.rate = rate
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        """Waits until a token is available, then consumes it."""
+        if self.rate <= 0:
+            return
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+                self.updated_at = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+# Module-level so every scraper instance (one per analysis) shares one budget
+_shared_executor = ThreadPoolExecutor(max_workers=MAX_CONCURRENCY, thread_name_prefix="playstore")
+_shared_limiter: Optional[TokenBucket] = None
+
+def get_shared_limiter() -> TokenBucket:
+    # Created lazily: asyncio.Lock must not be built before the event loop exists on 3.9
+    global _shared_limiter
+    if _shared_limiter is None:
+        _shared_limiter = TokenBucket()
+    return _shared_limiter
+
+# --- HELPER: INCREMENTAL REVIEW STATE ---
+class ReviewHistory:
+    """Per-app high-water mark and last review batch, bounded to the most recent apps.
+
+    In-process stand-in for ScrapeArtifactCache's review batches when no shared cache is wired in.
+    """
+    def __init__(self, max_apps: int = 500):
+        self.max_apps = max_apps
+        self._entries: "OrderedDict[tuple, Dict]" = OrderedDict()
+
+    async def get_reviews(self, app_id: str, lang: str, country: str) -> Optional[Dict]:
+        key = (app_id, lang, country)
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    async def set_reviews(self, app_id: str, lang: str, country: str, entry: Dict):
+        key = (app_id, lang, country)
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_apps:
+            self._entries.popitem(last=False)
+
+_shared_review_history = ReviewHistory()
+
+# --- HELPER: UPSTREAM CLIENT ---
+# Anything exposing google_play_scraper's search/app/reviews functions, e.g. the
+# offline stand-in in benchmarks/fake_play_store.py
+_default_client = google_play_scraper
+
+def set_default_client(client):
+    """Swaps the Play Store client used by scrapers built without an explicit one."""
+    global _default_client
+    _default_client = client or google_play_scraper
+
+def _review_timestamp(value) -> str:
+    return value.isoformat() if hasattr(value, 'isoformat') else str(value or '')
+
 class PlayStoreScraper:
-    def __init__(self):
-        self.rate_limit_delay = 0.5
-    
-    async def search_genre(self, genre: str, limit: int = 10) -> List[Dict]:
-        """Searches for apps and enriches metadata."""
+    def __init__(self, max_concurrency: int = MAX_CONCURRENCY,
+                 rate_limiter: Optional[TokenBucket] = None,
+                 executor: Optional[ThreadPoolExecutor] = None,
+                 artifacts=None, lang: str = 'en', country: str = 'us', client=None):
+        self.max_concurrency = max(1, max_concurrency)
+        self.client = client or _default_client
+        self.rate_limiter = rate_limiter or get_shared_limiter()
+        self.executor = executor or _shared_executor
+        # Optional ScrapeArtifactCache: search hits, app details and review batches shared across genres
+        self.artifacts = artifacts
+        self.review_history = artifacts or _shared_review_history
+        self.lang = lang
+        self.country = country
+        # Shared with every for_region() sibling
+        self.upstream_calls = Counter()
+        self.upstream_errors = Counter()
+        self.deduplicated = Counter()
+        self._inflight: Dict[tuple, asyncio.Future] = {}
+        self._slots: Optional[asyncio.Semaphore] = None
+
+    def for_region(self, lang: str, country: str) -> 'PlayStoreScraper':
+        """A scraper for another region sharing this one's budget, in-flight fetches and counters."""
+        if (lang, country) == (self.lang, self.country):
+            return self
+        self._get_slots()  # Built before copying so every sibling shares the one concurrency cap
+        sibling = copy.copy(self)
+        sibling.lang, sibling.country = lang, country
+        return sibling
+
+    def _get_slots(self) -> asyncio.Semaphore:
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_concurrency)
+        return self._slots
+
+    async def _call_upstream(self, func, *args, **kwargs):
+        """Runs a blocking google_play_scraper call on the worker pool, off the event loop."""
+        await self.rate_limiter.acquire()
+        loop = asyncio.get_running_loop()
+        name = func.__name__
+        self.upstream_calls[name] += 1
+        started = time.perf_counter()
+        outcome = 'ok'
+        try:
+            return await loop.run_in_executor(self.executor, functools.partial(func, *args, **kwargs))
+        except Exception:
+            self.upstream_errors[name] += 1
+            outcome = 'error'
+            raise
+        finally:
+            elapsed = time.perf_counter() - started
+            UPSTREAM_SECONDS.observe(elapsed, call=name)
+            UPSTREAM_REQUESTS.inc(call=name, outcome=outcome)
+            record_timing(f"upstream_{name}", elapsed)
+
+    async def _coalesced(self, key: tuple, factory):
+        """Shares one in-flight fetch per key between concurrent callers (e.g. genres in a batch)."""
+        future = self._inflight.get(key)
+        if future is None:
+            future = asyncio.ensure_future(factory())
+            self._inflight[key] = future
+            future.add_done_callback(lambda _: self._inflight.pop(key, None))
+        else:
+            self.deduplicated[key[0]] += 1
+        return await asyncio.shield(future)
+
+    async def _fetch_details(self, app_id: str) -> Optional[Dict]:
+        return await self._coalesced(
+            ('details', app_id, self.lang, self.country), lambda: self._load_details(app_id)
+        )
+
+    async def _load_details(self, app_id: str) -> Optional[Dict]:
+        """Fetches one app's details; failures are isolated to that app."""
+        if self.artifacts:
+            cached = await self.artifacts.get_details(app_id, self.lang, self.country)
+            if cached is not None:
+                return cached
+        async with self._get_slots():
+            try:
+                details = await self._call_upstream(self.client.app, app_id, lang=self.lang, country=self.country)
+                enriched = {
+                    'app_id': details['appId'],
+                    'title': details['title'],
+                    'rating': details.get('score', 0),
+                    'installs_numeric': parse_installs(details.get('installs', '0')),
+                    'description': details.get('description', ''),
+                    'icon': details.get('icon', '')
+                }
+            except Exception:
+                return None
+        if self.artifacts:
+            await self.artifacts.set_details(app_id, self.lang, self.country, enriched)
+        return enriched
+
+    async def _search_app_ids(self, genre: str, limit: int) -> List[str]:
+        if self.artifacts:
+            cached = await self.artifacts.get_search(genre, self.lang, self.country, limit)
+            if cached is not None:
+                return cached
+        results = await self._call_upstream(self.client.search, genre, lang=self.lang, country=self.country, n_hits=limit)
+        app_ids = [app_data['appId'] for app_data in results]
+        if self.artifacts:
+            await self.artifacts.set_search(genre, self.lang, self.country, limit, app_ids)
+        return app_ids
+
+    async def search_genre(self, genre: str, limit: int = 10, progress: ProgressCallback = None) -> List[Dict]:
+        """Searches for apps and enriches metadata concurrently, preserving search order."""
         try:
             print(f"🔍 Searching Play Store for '{genre}' apps...")
-            results = search(genre, lang="en", country="us", n_hits=limit)
+            with span('search'):
+                app_ids = await self._search_app_ids(genre, limit)
+            if progress: progress('details')
             
-            enriched_results = []
-            for app_data in results:
-                try:
-                    details = app(app_data['appId'], lang='en', country='us')
-                    enriched_results.append({
-                        'app_id': details['appId'],
-                        'title': details['title'],
-                        'rating': details.get('score', 0),
-                        'installs_numeric': parse_installs(details.get('installs', '0')),
-                        'description': details.get('description', ''),
-                        'icon': details.get('icon', '')
-                    })
-                    await asyncio.sleep(self.rate_limit_delay)
-                except Exception:
-                    continue
-            return enriched_results
+            with span('details'):
+                enriched = await asyncio.gather(*(self._fetch_details(app_id) for app_id in app_ids))
+            return [item for item in enriched if item is not None]
         except Exception as e:
             print(f"❌ Search Error: {e}")
             return []
     
-    async def scrape_reviews(self, app_id: str, max_reviews: int = 40) -> List[Dict]:
-        """Retrieves user reviews for sentiment analysis."""
+    async def fetch_review_page(self, app_id: str, count: int = REVIEW_PAGE_SIZE,
+                                continuation_token=None, filter_score: Optional[int] = None
+                                ) -> Tuple[List[Dict], object]:
+        """Fetches one page of newest-first reviews; pass the returned token to get the next page."""
+        result, token = await self._call_upstream(
+            self.client.reviews, app_id, lang=self.lang, country=self.country, sort=Sort.NEWEST, count=count,
+            filter_score_with=filter_score, continuation_token=continuation_token
+        )
+        page = [{
+            'review_id': r.get('reviewId'),
+            'content': r['content'],
+            'score': r['score'],
+            'at': _review_timestamp(r.get('at'))
+        } for r in result]
+        return page, token
+
+    async def scrape_reviews(self, app_id: str, max_reviews: int = 40,
+                             scores: Sequence[int] = NEGATIVE_SCORES,
+                             max_pages: int = REVIEW_MAX_PAGES) -> List[Dict]:
+        return await self._coalesced(
+            ('reviews', app_id, self.lang, self.country, max_reviews, tuple(scores or ())),
+            lambda: self._load_reviews(app_id, max_reviews, scores, max_pages)
+        )
+
+    async def _load_reviews(self, app_id: str, max_reviews: int, scores: Sequence[int],
+                            max_pages: int) -> List[Dict]:
+        """Retrieves low-rated reviews page by page, stopping once enough are collected.
+
+        Reviews at or before the app's high-water mark from the previous sweep are not
+        fetched again; the new ones are merged in front of the previous batch. A batch
+        swept within REVIEW_FRESH_SECONDS is reused without any upstream call.
+        """
+        history = await self.review_history.get_reviews(app_id, self.lang, self.country)
+        if history and time.time() - history.get('fetched_at', 0) < REVIEW_FRESH_SECONDS:
+            return history['reviews'][:max_reviews]
+        watermark = history['watermark'] if history else None
+        newest = watermark
+        fresh: List[Dict] = []
+        # The upstream API filters on a single score only, so wider sets are filtered here
+        filter_score = scores[0] if scores and len(scores) == 1 else None
+        token = None
+        failed = False
+
         try:
-            result = reviews_all(app_id, sleep_milliseconds=100, lang='en', country='us', sort=Sort.MOST_RELEVANT)
-            return [{'content': r['content'], 'score': r['score']} for r in result[:max_reviews]]
+            for _ in range(max_pages):
+                page, token = await self.fetch_review_page(
+                    app_id, continuation_token=token, filter_score=filter_score
+                )
+                reached_watermark = False
+                for r in page:
+                    if watermark and r['at'] <= watermark:
+                        reached_watermark = True
+                        break
+                    if not newest or r['at'] > newest:
+                        newest = r['at']
+                    if not scores or r['score'] in scores:
+                        fresh.append(r)
+                if (len(fresh) >= max_reviews or reached_watermark or not page
+                        or token is None or getattr(token, 'token', None) is None):
+                    break
         except Exception:
-            return []
+            failed = True
+            if not fresh and not history:
+                return []
 
-class SentimentAnalyzer:
-    def analyze_reviews(self, reviews: List[Dict]) -> List[Dict]:
-        """Categorizes negative reviews into pain points."""
-        complaint_counter = Counter()
-        keywords = {
-            'Too Many Ads': ['ad', 'ads', 'advert'],
-            'Bugs/Crashes': ['crash', 'freeze', 'bug', 'error'],
-            'Expensive': ['price', 'cost', 'subscription'],
-            'Poor UI': ['ugly', 'confusing', 'hard to use'],
-            'Missing Features': ['wish', 'need', 'missing']
-        }
-        
-        for review in reviews:
-            if review.get('score', 5) <= 3:
-                text = str(review.get('content', '')).lower()
-                for category, words in keywords.items():
-                    if any(w in text for w in words):
-                        complaint_counter[category] += 1
-        
-        return [{'category': k, 'count': v} for k, v in complaint_counter.most_common(5)]
+        seen = set()
+        batch = []
+        for r in fresh + (history['reviews'] if history else []):
+            if r['review_id'] in seen:
+                continue
+            seen.add(r['review_id'])
+            batch.append(r)
+            if len(batch) >= max_reviews:
+                break
+        # A failed sweep keeps the old timestamp so the next analysis retries
+        fetched_at = history.get('fetched_at', 0) if failed and history else time.time()
+        await self.review_history.set_reviews(
+            app_id, self.lang, self.country, {'watermark': newest, 'reviews': batch, 'fetched_at': fetched_at}
+        )
+        return batch
 
 # --- MAIN ORCHESTRATOR ---
-async def run_full_analysis(genre: str) -> Dict:
-    """Orchestrates the full market sweep."""
-    print(f"📡 Starting analysis for: {genre}")
-    play_scraper = PlayStoreScraper()
-    sentiment_analyzer = SentimentAnalyzer()
+async def iter_analysis(genre: str, artifacts=None, progress: ProgressCallback = None,
+                        scraper: Optional[PlayStoreScraper] = None, lang: str = 'en', country: str = 'us',
+                        history=None, offline: bool = False) -> AsyncIterator[Tuple[str, Dict]]:
+    """Runs the market sweep as a pipeline, yielding (stage, partial result) as each part is ready.
+
+    Stages in order: 'market' (apps and market metrics), 'sentiment', 'gaps', 'strategy'.
+    `progress` is called with each ANALYSIS_STAGES name as that stage starts. Passing a
+    `scraper` lets many analyses share its rate budget and in-flight fetches.
+
+    With a HistoryStore as `history`, scraped apps and reviews are recorded to it in the
+    background; with `offline` as well, they are read back from it instead and no
+    network call is made.
+    """
+    # Deferred so NumPy loads during startup warm-up (or on first use), not at import
+    import numpy as np
+    from scoring import features_for, gap_matrix, gap_noise, score_markets, stack_app_metrics
+
+    print(f"📡 Starting analysis for: {genre}" + (" (offline rescore)" if offline else ""))
+    report = progress or (lambda stage: None)
+    if offline:
+        if history is None:
+            raise ValueError("Offline rescoring needs a history store")
+        play_scraper = history.replay(lang, country)
+    elif scraper is not None:
+        play_scraper = scraper.for_region(lang, country)
+    else:
+        play_scraper = PlayStoreScraper(artifacts=artifacts, lang=lang, country=country)
+    sentiment_analyzer = SentimentAnalyzer(genre)
     
     # 1. Scrape App Data
-    play_apps = await play_scraper.search_genre(genre)
-    
-    # 2. Scrape & Analyze Reviews
-    all_reviews = []
-    for app_item in play_apps[:3]:
-        reviews = await play_scraper.scrape_reviews(app_item['app_id'])
-        all_reviews.extend(reviews)
+    report('search')
+    play_apps = await play_scraper.search_genre(genre, progress=report)
+    if history is not None and not offline:
+        # Writes share the store's one thread with history queries; never hold a section on them
+        history.record_later(history.record_apps(genre, lang, country, play_apps))
+
+    # 2. Calculate Market Metrics (needs only the app list)
+    market = score_markets(*stack_app_metrics([play_apps])[:2])
+    avg_rating = float(market['avg_rating'][0])
+    saturation = int(market['saturation'][0])
+    yield 'market', {
+        'opportunity_score': int(market['opportunity'][0]),
+        'saturation_score': saturation,
+        'play_store_apps': play_apps
+    }
     
-    sentiment_results = sentiment_analyzer.analyze_reviews(all_reviews)
+    # 3. Scrape & Analyze Reviews (top 3 apps fetched concurrently)
+    report('reviews')
+    with span('reviews'):
+        review_batches = await asyncio.gather(
+            *(play_scraper.scrape_reviews(app_item['app_id']) for app_item in play_apps[:3])
+        )
+    if history is not None and not offline:
+        for app_item, batch in zip(play_apps, review_batches):
+            history.record_later(history.record_reviews(app_item['app_id'], lang, country, batch))
+    all_reviews = [r for batch in review_batches for r in batch]
     
-    # 3. Calculate Market Metrics
-    valid_ratings = [a.get('rating', 0) for a in play_apps if a.get('rating') is not None]
-    avg_rating = sum(valid_ratings) / max(len(valid_ratings), 1) if valid_ratings else 4.0
-    total_installs = sum(app.get('installs_numeric', 0) for app in play_apps)
-    saturation = min(int(total_installs / 1000000), 100)
+    report('sentiment')
+    with span('sentiment'):
+        sentiment_results = sentiment_analyzer.analyze_reviews(all_reviews)
+    yield 'sentiment', {'sentiment_data': sentiment_results}
     
     # 4. Generate EXACTLY 5 Feature Gaps for the Polygon
-    random.seed(genre)
-    feature_sets = {
-        "Productivity": ["AI Task Prep", "Offline Sync", "Collab Tools", "Privacy Shield", "Automation"],
-        "Fitness": ["Heart Tracking", "Meal Planner", "Social Community", "Wearable Sync", "AI Coach"],
-        "Finance": ["Crypto Sync", "Tax Export", "Budgeting Bot", "Fraud Alert", "Goal Tracker"]
-    }
-    features = feature_sets.get(genre, ["AI Logic", "Offline Mode", "Customization", "Analytics", "Security"])
-
-    base_coverage = int((avg_rating / 5) * 100)
+    report('scoring')
+    features = features_for(genre)
     complaint_map = {c['category']: c['count'] for c in sentiment_results}
-    
-    competitive_gaps = []
-    for f in features:
-        market_score = max(20, min(85, base_coverage + random.randint(-10, 10)))
-        pain_factor = (complaint_map.get('Bugs/Crashes', 0) + complaint_map.get('Missing Features', 0)) // 2
-        opp_score = max(30, min(95, (100 - base_coverage) + pain_factor))
-        
-        competitive_gaps.append({
-            'feature': f,
-            'market': market_score,
-            'opportunity': opp_score
-        })
+    pain_factor = (complaint_map.get('Bugs/Crashes', 0) + complaint_map.get('Missing Features', 0)) // 2
+    gap_market, gap_opportunity = gap_matrix(np.array([avg_rating]), np.array([pain_factor]),
+                                             gap_noise([genre], len(features)))
+    competitive_gaps = [
+        {'feature': f, 'market': int(m), 'opportunity': int(o)}
+        for f, m, o in zip(features, gap_market[0], gap_opportunity[0])
+    ]
+    yield 'gaps', {'competitive_gaps': competitive_gaps}
 
     # --- ROADMAP & TECH STACK LOGIC ---
     tech_stack = [
@@ -146,13 +410,7 @@ async def run_full_analysis(genre: str) -> Dict:
         }
     ]
 
-    return {
-        'genre': genre,
-        'opportunity_score': max(10, min(95, int(100 - (saturation * 0.5) + (5 - avg_rating) * 10))),
-        'saturation_score': saturation,
-        'play_store_apps': play_apps,
-        'sentiment_data': sentiment_results,
-        'competitive_gaps': competitive_gaps,
+    yield 'strategy', {
         'tech_stack': tech_stack,       # Now populates TechStack
         'recommendations': recommendations # Now populates StrategicRoadmap
-    }
\ No newline at end of file
+    }
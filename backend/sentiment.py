@@ -0,0 +1,148 @@
+import re
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+# A trailing '*' matches any word continuing the stem ('crash*' -> crashes, crashed);
+# every other keyword must match a whole word, so 'ad' no longer hits "bad" or "download".
+DEFAULT_KEYWORDS: Dict[str, List[str]] = {
+    'Too Many Ads': ['ad', 'ads', 'advert*'],
+    'Bugs/Crashes': ['crash*', 'freez*', 'froze', 'bug', 'bugs', 'buggy', 'error*'],
+    'Expensive': ['price', 'prices', 'pricey', 'cost*', 'subscription*'],
+    'Poor UI': ['ugly', 'confusing', 'hard to use'],
+    'Missing Features': ['wish', 'need', 'missing']
+}
+
+# Extra categories merged over the defaults for specific genres
+GENRE_KEYWORDS: Dict[str, Dict[str, List[str]]] = {
+    'Fitness': {'Tracking Issues': ['inaccurate', 'gps', 'step count*', 'sync*']},
+    'Finance': {'Security Concerns': ['scam*', 'fraud*', 'hack*', 'unsafe']},
+    'Productivity': {'Sync Issues': ['sync*', 'lost my', 'not saving']}
+}
+
+NEGATIVE_MAX_SCORE = 3
+TOP_CATEGORIES = 5
+
+KeywordSpec = Tuple[Tuple[str, Tuple[str, ...]], ...]
+
+def keywords_for_genre(genre: Optional[str]) -> Dict[str, List[str]]:
+    keywords = {category: list(words) for category, words in DEFAULT_KEYWORDS.items()}
+    for category, words in GENRE_KEYWORDS.get(genre or '', {}).items():
+        keywords.setdefault(category, []).extend(words)
+    return keywords
+
+def _freeze(keywords: Dict[str, Sequence[str]]) -> KeywordSpec:
+    return tuple((category, tuple(words)) for category, words in keywords.items())
+
+def _term_pattern(term: str) -> str:
+    prefix = term.endswith('*')
+    words = term.rstrip('*').lower().split()
+    body = r'\s+'.join(re.escape(w) for w in words)
+    return rf"{body}\w*" if prefix else rf"{body}\b"
+
+class KeywordMatcher:
+    """All categories compiled into one regex; a single scan per review finds every category.
+
+    The scan stops only where some keyword starts. There, each category is an optional
+    lookahead with its own capturing group, so every category starting at that word is
+    recorded and none consumes text another could match ('crash*' vs 'crash report*').
+    """
+    def __init__(self, spec: KeywordSpec):
+        self.categories = [category for category, _ in spec]
+        # '(?!)' never matches: a category without keywords must not match everywhere
+        bodies = ['|'.join(_term_pattern(t) for t in words) or '(?!)' for _, words in spec]
+        probes = ''.join(f"(?:(?=({body})))?" for body in bodies)
+        self.pattern = re.compile(rf"\b(?=(?:{'|'.join(bodies)})){probes}", re.IGNORECASE)
+
+    def categories_in(self, text: str) -> set:
+        found = set()
+        for match in self.pattern.finditer(text):
+            # Group i+1 is category i; every other group in the pattern is non-capturing
+            found.update(i for i, value in enumerate(match.groups()) if value is not None)
+            if len(found) == len(self.categories):
+                break
+        return {self.categories[i] for i in found}
+
+@lru_cache(maxsize=32)
+def get_matcher(spec: KeywordSpec) -> KeywordMatcher:
+    """Compiled once per keyword set (and once per worker process in batch mode)."""
+    return KeywordMatcher(spec)
+
+def _count_chunk(spec: KeywordSpec, reviews: List[Dict]) -> Counter:
+    matcher = get_matcher(spec)
+    counter = Counter()
+    for review in reviews:
+        if review.get('score', 5) <= NEGATIVE_MAX_SCORE:
+            counter.update(matcher.categories_in(str(review.get('content', ''))))
+    return counter
+
+def _chunks(reviews: Iterable[Dict], size: int) -> Iterator[List[Dict]]:
+    iterator = iter(reviews)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+def _top(counter: Counter) -> List[Dict]:
+    return [{'category': k, 'count': v} for k, v in counter.most_common(TOP_CATEGORIES)]
+
+class SentimentAnalyzer:
+    def __init__(self, genre: Optional[str] = None, keywords: Optional[Dict[str, Sequence[str]]] = None):
+        self.spec = _freeze(keywords if keywords is not None else keywords_for_genre(genre))
+        self.matcher = get_matcher(self.spec)
+
+    def analyze_reviews(self, reviews: List[Dict]) -> List[Dict]:
+        """Categorizes negative reviews into pain points."""
+        return _top(_count_chunk(self.spec, reviews))
+
+    def analyze_stream(self, reviews: Iterable[Dict], chunk_size: int = 20000,
+                       processes: int = 1) -> List[Dict]:
+        """Same result as analyze_reviews over a stream of any length (e.g. a generator).
+
+        With processes > 1 chunks are counted on a process pool, keeping at most two
+        chunks per worker in flight so memory stays bounded for 100k+ review corpora.
+        """
+        counter = Counter()
+        if processes <= 1:
+            for chunk in _chunks(reviews, chunk_size):
+                counter.update(_count_chunk(self.spec, chunk))
+            return _top(counter)
+
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            pending = []
+            for chunk in _chunks(reviews, chunk_size):
+                pending.append(pool.submit(_count_chunk, self.spec, chunk))
+                if len(pending) >= processes * 2:
+                    counter.update(pending.pop(0).result())
+            for future in pending:
+                counter.update(future.result())
+        return _top(counter)
+
+def _phrase_at(text: str, words: List[Tuple[str, int, int]], i: int, term: str) -> bool:
+    parts = term.rstrip('*').lower().split()
+    if i + len(parts) > len(words):
+        return False
+    for j, part in enumerate(parts):
+        word, start, _ = words[i + j]
+        if j and not text[words[i + j - 1][2]:start].isspace():
+            return False  # Phrase words must be separated by whitespace only
+        last_prefix = j == len(parts) - 1 and term.endswith('*')
+        if not (word.startswith(part) if last_prefix else word == part):
+            return False
+    return True
+
+def reference_counts(reviews: Iterable[Dict], keywords: Dict[str, Sequence[str]]) -> Counter:
+    """Word-by-word matcher, independent of KeywordMatcher's regex, used to validate it."""
+    counter = Counter()
+    for review in reviews:
+        if review.get('score', 5) > NEGATIVE_MAX_SCORE:
+            continue
+        text = str(review.get('content', ''))
+        words = [(m.group().lower(), m.start(), m.end()) for m in re.finditer(r'\w+', text)]
+        for category, terms in keywords.items():
+            if any(_phrase_at(text, words, i, term) for term in terms for i in range(len(words))):
+                counter[category] += 1
+    return counter
@@ -0,0 +1,144 @@
+import asyncio
+import inspect
+import os
+import time
+from typing import Callable, Dict, List, Optional
+
+from metrics import STARTUP_SECONDS
+
+BOOT_STARTED = time.perf_counter()  # The API module imports this first, so this is where its own imports begin
+
+# eager: warm everything before serving; background: serve at once and warm alongside;
+# lazy: warm nothing, each component loads on first use
+STARTUP_WARM_MODE = os.getenv("STARTUP_WARM_MODE", "background")
+STARTUP_WARM_MODES = ('eager', 'background', 'lazy')
+READY_REQUIRES_REDIS = os.getenv("READY_REQUIRES_REDIS", "0") == "1"  # Otherwise L1 alone counts as ready
+
+class WarmStep:
+    def __init__(self, name: str, func: Callable, required: bool, background: bool, probe: Optional[Callable]):
+        self.name = name
+        self.func = func
+        self.required = required
+        self.background = background
+        self.probe = probe
+        self.state = 'pending'  # pending, running, ready, failed or lazy
+        self.seconds: Optional[float] = None
+        self.error: Optional[str] = None
+
+    @property
+    def warm(self) -> bool:
+        # A probe reflects the component now (e.g. Redis reconnecting after a failed start)
+        if self.probe is not None and self.state in ('ready', 'failed', 'lazy'):
+            return bool(self.probe())
+        return self.state == 'ready'
+
+    def snapshot(self) -> Dict:
+        return {
+            'state': self.state, 'warm': self.warm, 'required': self.required,
+            'ms': round(self.seconds * 1000, 1) if self.seconds is not None else None, 'error': self.error
+        }
+
+class StartupManager:
+    """Warms heavy components (imports, worker pools, connections) according to STARTUP_WARM_MODE.
+
+    Steps are coroutines or plain functions (run on a thread), started in the order
+    they were added; returning False marks the step failed. `background` steps never
+    hold up startup, whatever the mode, so an unreachable Redis cannot delay serving.
+    Readiness waits for every required step that was scheduled; in lazy mode nothing
+    is, and the process is ready at once.
+    """
+    def __init__(self, mode: str = STARTUP_WARM_MODE, boot_started: float = BOOT_STARTED):
+        if mode not in STARTUP_WARM_MODES:
+            print(f"⚠️ Unknown STARTUP_WARM_MODE '{mode}', using 'background'")
+            mode = 'background'
+        self.mode = mode
+        self.boot_started = boot_started
+        self.phases: Dict[str, float] = {}
+        self.steps: List[WarmStep] = []
+        self._task: Optional[asyncio.Future] = None
+
+    def mark(self, phase: str):
+        """Records how long after boot `phase` was reached."""
+        elapsed = time.perf_counter() - self.boot_started
+        self.phases[phase] = elapsed
+        STARTUP_SECONDS.observe(elapsed, phase=phase)
+
+    def add_step(self, name: str, func: Callable, required: bool = True, background: bool = False,
+                 probe: Optional[Callable[[], bool]] = None):
+        self.steps.append(WarmStep(name, func, required, background, probe))
+
+    async def _run(self, step: WarmStep):
+        step.state = 'running'
+        started = time.perf_counter()
+        try:
+            if inspect.iscoroutinefunction(step.func):
+                result = await step.func()
+            else:
+                result = await asyncio.to_thread(step.func)
+            step.state = 'failed' if result is False else 'ready'
+        except Exception as e:
+            step.state, step.error = 'failed', str(e)
+            print(f"⚠️ Warm-up step '{step.name}' failed: {e}")
+        step.seconds = time.perf_counter() - started
+        STARTUP_SECONDS.observe(step.seconds, step=step.name)
+
+    async def _run_all(self, steps: List[WarmStep]):
+        await asyncio.gather(*(self._run(step) for step in steps))
+        if 'warm' not in self.phases and all(step.state not in ('pending', 'running') for step in self.steps):
+            self.mark('warm')
+            self._print_profile()
+
+    async def start(self):
+        """Called from the startup hook; returns once the mode's blocking steps are done."""
+        self.mark('startup')
+        blocking = [s for s in self.steps if self.mode == 'eager' and not s.background]
+        deferred = [s for s in self.steps if s.background or self.mode == 'background']
+        for step in self.steps:
+            if step not in blocking and step not in deferred:
+                step.state = 'lazy'
+        if deferred:
+            self._task = asyncio.ensure_future(self._run_all(deferred))
+        if blocking:
+            await self._run_all(blocking)
+        self.mark('serving')
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def _print_profile(self):
+        phases = ", ".join(f"{name} {seconds * 1000:.0f}ms" for name, seconds in self.phases.items())
+        steps = ", ".join(f"{s.name} {s.seconds * 1000:.0f}ms" for s in self.steps if s.seconds is not None)
+        print(f"🚀 Startup ({self.mode}): {phases}" + (f" | warm-up: {steps}" if steps else ""))
+
+    def readiness(self) -> Dict:
+        components = {step.name: step.snapshot() for step in self.steps}
+        ready = all(step.state == 'lazy' or step.warm for step in self.steps if step.required)
+        return {'status': 'ready' if ready else 'warming', 'mode': self.mode, 'components': components}
+
+    def profile(self) -> Dict:
+        return {
+            'mode': self.mode,
+            'phases_ms': {name: round(seconds * 1000, 1) for name, seconds in self.phases.items()},
+            'steps': {step.name: step.snapshot() for step in self.steps}
+        }
+
+def add_health_endpoints(app, manager: StartupManager):
+    """Registers liveness, readiness and startup-profile probes under /health."""
+    from fastapi.responses import JSONResponse
+
+    @app.get("/health/live")
+    async def liveness():
+        # The event loop answered; nothing else is checked
+        return {"status": "alive", "uptime": round(time.perf_counter() - manager.boot_started, 1)}
+
+    @app.get("/health/ready")
+    async def readiness():
+        report = manager.readiness()
+        return JSONResponse(report, status_code=200 if report['status'] == 'ready' else 503)
+
+    @app.get("/health/startup")
+    async def startup_profile():
+        return manager.profile()
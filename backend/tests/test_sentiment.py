@@ -0,0 +1,53 @@
+"""KeywordMatcher against the word-by-word reference matcher. Run from backend/: python -m pytest tests"""
+import os
+import random
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sentiment import (GENRE_KEYWORDS, SentimentAnalyzer, _count_chunk, _freeze, get_matcher, keywords_for_genre,
+                       reference_counts)
+
+OVERLAPPING = {
+    'Bugs': ['crash*', 'bug'],
+    'Reporting': ['crash report*', 'bug report'],
+    'Poor UI': ['hard to use', 'ugly'],
+    'Difficulty': ['hard', 'too hard*'],
+}
+
+WORDS = ["the", "app", "crash", "crashes", "crash-report", "reporter", "report", "bug", "bugs", "buggy", "hard",
+         "to", "use", "too", "hardly", "ad", "ads", "bad", "download", "advert", "sync", "syncing", "step", "count",
+         "counter", "lost", "my", "not", "saving", "scam", "GPS", "Price", "pricey", "wish", "need", "missing",
+         "error", "froze", "freezing", "ugly", "confusing", "subscription"]
+SEPARATORS = [" ", " ", " ", "  ", ", ", ". ", "-", "\n", "!", "_"]
+
+def _review(rng: random.Random) -> dict:
+    parts = []
+    for _ in range(rng.randint(0, 14)):
+        parts += [rng.choice(WORDS), rng.choice(SEPARATORS)]
+    return {'content': "".join(parts), 'score': rng.randint(1, 5)}
+
+@pytest.mark.parametrize("text, expected", [
+    ("the crash reporter is broken", {'Bugs', 'Reporting'}),
+    ("so hard to use", {'Poor UI', 'Difficulty'}),
+    ("filed a bug report", {'Bugs', 'Reporting'}),
+    ("too hardcore", {'Difficulty'}),
+    ("hard-to-use", {'Difficulty'}),
+    ("debug mode", set()),
+])
+def test_overlapping_categories_all_match(text, expected):
+    matcher = get_matcher(_freeze(OVERLAPPING))
+    assert matcher.categories_in(text) == expected
+    assert set(reference_counts([{'content': text, 'score': 1}], OVERLAPPING)) == expected
+
+@pytest.mark.parametrize("keywords", [OVERLAPPING] + [keywords_for_genre(g) for g in [None, *GENRE_KEYWORDS]])
+def test_matches_reference_on_random_reviews(keywords):
+    reviews = [_review(random.Random(seed)) for seed in range(3000)]
+    assert _count_chunk(_freeze(keywords), reviews) == reference_counts(reviews, keywords)
+
+def test_stream_matches_batch():
+    reviews = [_review(random.Random(seed)) for seed in range(2000)]
+    analyzer = SentimentAnalyzer("Fitness")
+    assert analyzer.analyze_stream(iter(reviews), chunk_size=300) == analyzer.analyze_reviews(reviews)